@@ -1,86 +1,216 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
+import shutil
+import subprocess
 import uuid
-from datetime import date, datetime, timezone
+import zipfile
+from contextlib import asynccontextmanager
+from datetime import date
 from pathlib import Path
 from typing import Literal, Optional
-from tempfile import NamedTemporaryFile
+from tempfile import NamedTemporaryFile, mkdtemp
 
-from fastapi import FastAPI, File, HTTPException, Query, UploadFile
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
 
 from app.settings import settings
 from app.services.anexo1_import import (
-    extract_prefill_for_anexo1,
-    extract_prefill_from_anexo1,
+    parse_doc_to_json,
+    prefill_anexo1_from_parsed,
+    prefill_anexo2_from_parsed,
 )
 from app.services.validate_anexo1 import validate_and_enrich_anexo1
 from app.services.validate_anexo2 import validate_and_enrich_anexo2
 from app.services.docx_render import render_docx_from_template
-from app.services.pdf_convert import convert_docx_to_pdf
+from app.services.compression import CompressionMiddleware
+from app.services.docx_xml_render import render_docx_xml
+from app.services.pdf_convert import (
+    convert_docx_to_pdf_async,
+    convert_many_to_pdf_async,
+    convert_to_pdf_async,
+    shutdown_pool,
+    warm_up_pool,
+)
+from app.services.drafts import (
+    DraftConflictError,
+    DraftNotFoundError,
+    close_draft_store,
+    get_draft_store,
+    merge_patch,
+)
+from app.services.executors import (
+    ParseLimitExceeded,
+    get_render_executor,
+    run_in_parse_pool,
+    shutdown_executors,
+    warm_up_parse_pool,
+)
+from app.services.janitor import Janitor
+from app.services.jobs import JobQueue, QueueFullError
+from app.services.metrics import CONTENT_TYPE, REGISTRY, UPLOAD_BYTES, MetricsMiddleware, stage
+from app.services.output_cache import cache_key, etag_for, get_output_cache
+from app.services.parse_cache import get_parse_cache
+from app.services.pages import PageCache
+from app.services.static_assets import DIST_NAME, accepted_encodings, get_manifest, media_type_for, pick_variant
+from app.services.uploads import ReceivedUpload, UploadFormatError, UploadTooLargeError, receive_upload
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # perfis do LibreOffice prontos antes do primeiro pedido de PDF
+    await run_in_threadpool(warm_up_pool)
+    await run_in_threadpool(_pages.preload, WEB_PAGES)
+    warm_up_parse_pool()
+    global _jobs
+    _jobs = JobQueue(settings.data_dir / "jobs", settings.jobs_workers, settings.jobs_max_queue, _run_job)
+    await _jobs.start()
+    janitor = Janitor(
+        settings.data_dir / ".janitor.lock",
+        settings.janitor_interval_s,
+        settings.draft_retention_days * 86400,
+        settings.janitor_batch_size,
+        settings.janitor_batch_pause_s,
+        data_dir=settings.data_dir,
+        jobs=_jobs,
+        jobs_retention_s=settings.jobs_retention_days * 86400,
+    )
+    await janitor.start()
+    yield
+    await janitor.stop()
+    await _jobs.stop()
+    shutdown_executors()
+    close_draft_store()
+    await run_in_threadpool(shutdown_pool)
 
 
-app = FastAPI(title="UFPB Diárias Wizard")
+def _json_response_class() -> type[JSONResponse]:
+    if settings.json_renderer == "orjson":
+        try:
+            import orjson  # noqa: F401
+        except ImportError:
+            logger.warning("orjson indisponível; usando o json padrão nas respostas.")
+        else:
+            return ORJSONResponse
+    return JSONResponse
 
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app = FastAPI(title="UFPB Diárias Wizard", lifespan=lifespan, default_response_class=_json_response_class())
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compress_min_bytes, level=settings.compress_level)
+if settings.metrics_enabled:
+    # por fora da compressão: a duração medida inclui o gzip
+    app.add_middleware(MetricsMiddleware)
 
-WEB_DIR = Path("app/web")
+_jobs: Optional[JobQueue] = None
 
-def _load_html(name: str) -> str:
-    return (WEB_DIR / name).read_text(encoding="utf-8")
 
-def _cleanup_old_data_files(days: int = 15) -> None:
-    cutoff = datetime.now(timezone.utc).timestamp() - (days * 86400)
-    if not settings.data_dir.exists():
-        return
+DOCX_RENDERERS = {
+    "python-docx": render_docx_from_template,
+    "lxml": render_docx_xml,
+}
 
-    for fp in settings.data_dir.iterdir():
-        if not fp.is_file():
-            continue
-        try:
-            modified = fp.stat().st_mtime
-        except OSError:
-            continue
-        if modified < cutoff:
-            fp.unlink(missing_ok=True)
+class _PrecompressedStaticFiles(StaticFiles):
+    """Em /static/dist/ (nomes com hash): variante .br/.gz pelo Accept-Encoding e cache imutável."""
+
+    async def get_response(self, path: str, scope) -> Response:
+        manifest = get_manifest()
+        if manifest is None or not path.startswith(f"{DIST_NAME}/") or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        served, encoding = pick_variant(path, Headers(scope=scope).get("accept-encoding", ""), manifest)
+        full_path, stat_result = await run_in_threadpool(self.lookup_path, served)
+        if stat_result is None:
+            return await super().get_response(path, scope)
 
+        headers = {
+            "Cache-Control": f"public, max-age={settings.static_max_age_s}, immutable",
+            "Vary": "Accept-Encoding",
+        }
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return FileResponse(full_path, stat_result=stat_result, media_type=media_type_for(path), headers=headers)
 
-def _ensure_data_dir() -> None:
-    settings.data_dir.mkdir(parents=True, exist_ok=True)
-    _cleanup_old_data_files(15)
+
+app.mount("/static", _PrecompressedStaticFiles(directory=str(settings.static_dir)), name="static")
+
+WEB_DIR = Path("app/web")
+WEB_PAGES = ("index.html", "anexo1.html", "anexo2.html", "review.html")
+
+_pages = PageCache(WEB_DIR, reload=settings.html_reload)
+
+
+def _html_page(request: Request, name: str) -> Response:
+    page = _pages.get(name)
+    use_gzip = page.gzip_body is not None and bool(
+        {"gzip", "*"} & accepted_encodings(request.headers.get("accept-encoding", ""))
+    )
+    headers = {
+        "ETag": page.gzip_etag if use_gzip else page.etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if _etag_matches(request, page.etag) or _etag_matches(request, page.gzip_etag):
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return HTMLResponse(page.gzip_body, headers=headers)
+    return HTMLResponse(page.body, headers=headers)
 
 def _save_draft(draft_id: str, payload: dict) -> None:
-    _ensure_data_dir()
-    fp = settings.data_dir / f"{draft_id}.json"
-    fp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    get_draft_store().save(draft_id, payload)
 
 def _load_draft(draft_id: str) -> dict:
-    fp = settings.data_dir / f"{draft_id}.json"
-    if not fp.exists():
+    try:
+        return get_draft_store().load(draft_id)
+    except DraftNotFoundError:
         raise HTTPException(404, "Rascunho não encontrado.")
-    return json.loads(fp.read_text(encoding="utf-8"))
 
 @app.get("/", response_class=HTMLResponse)
-def home():
-    return _load_html("index.html")
+def home(request: Request):
+    return _html_page(request, "index.html")
 
 @app.get("/anexo1", response_class=HTMLResponse)
-def anexo1_page():
-    return _load_html("anexo1.html")
+def anexo1_page(request: Request):
+    return _html_page(request, "anexo1.html")
 
 @app.get("/anexo2", response_class=HTMLResponse)
-def anexo2_page():
-    return _load_html("anexo2.html")
+def anexo2_page(request: Request):
+    return _html_page(request, "anexo2.html")
+
+def _draft_etag(version: int) -> str:
+    return f'"v{version}"'
+
+
+def _if_match_version(request: Request) -> Optional[int]:
+    """Versão exigida pelo If-Match; None sem o cabeçalho (ou com `*`)."""
+    header = request.headers.get("if-match")
+    if not header or header.strip() == "*":
+        return None
+    tag = header.split(",")[0].strip().removeprefix("W/").strip('"')
+    if not (tag.startswith("v") and tag[1:].isdigit()):
+        raise HTTPException(400, "If-Match inválido. Use o ETag devolvido pelo rascunho.")
+    return int(tag[1:])
+
 
 @app.post("/api/drafts")
-def create_draft(kind: Literal["anexo1", "anexo2"]):
+def create_draft(kind: Literal["anexo1", "anexo2"], response: Response):
     draft_id = str(uuid.uuid4())
-    _save_draft(draft_id, {"kind": kind, "created_at": str(date.today()), "data": {}})
-    return {"draft_id": draft_id}
+    _save_draft(draft_id, {"kind": kind, "created_at": str(date.today()), "version": 1, "data": {}})
+    response.headers["ETag"] = _draft_etag(1)
+    return {"draft_id": draft_id, "version": 1}
+
+if settings.metrics_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
 
 @app.get("/api/server-date")
 def server_date():
@@ -88,131 +218,336 @@ def server_date():
     return {"date": str(date.today())}
 
 @app.get("/api/drafts/{draft_id}")
-def get_draft(draft_id: str):
-    return _load_draft(draft_id)
+def get_draft(draft_id: str, response: Response):
+    draft = _load_draft(draft_id)
+    response.headers["ETag"] = _draft_etag(draft.get("version", 0))
+    return draft
 
 @app.patch("/api/drafts/{draft_id}")
-def patch_draft(draft_id: str, data: dict):
-    draft = _load_draft(draft_id)
-    draft["data"] = {**draft.get("data", {}), **data}
-    _save_draft(draft_id, draft)
-    return {"ok": True}
+def patch_draft(draft_id: str, data: dict, request: Request, response: Response):
+    """
+    Com `Content-Type: application/merge-patch+json` o corpo é um JSON Merge
+    Patch (RFC 7396) sobre `data`: basta enviar as folhas alteradas, e `null`
+    apaga. Com `application/json` continua a mescla rasa (seções inteiras).
+    `If-Match` com o ETag do rascunho faz a gravação falhar com 409 se outra
+    edição passou na frente.
+    """
+    content_type = request.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    expected = _if_match_version(request)
+
+    def _merge(draft: dict) -> dict:
+        current = draft.get("version", 0)
+        if expected is not None and expected != current:
+            raise DraftConflictError(current)
+        if content_type == "application/merge-patch+json":
+            draft["data"] = merge_patch(draft.get("data", {}), data)
+        else:
+            draft["data"] = {**draft.get("data", {}), **data}
+        draft["version"] = current + 1
+        return draft
+
+    try:
+        draft = get_draft_store().update(draft_id, _merge)
+    except DraftNotFoundError:
+        raise HTTPException(404, "Rascunho não encontrado.")
+    except DraftConflictError as exc:
+        raise HTTPException(
+            409,
+            "O rascunho foi alterado em outra janela. Recarregue-o antes de salvar.",
+            headers={"ETag": _draft_etag(exc.current)},
+        )
+    response.headers["ETag"] = _draft_etag(draft["version"])
+    return {"ok": True, "version": draft["version"]}
 
 @app.post("/api/anexo1/preview")
 def preview_anexo1(payload: dict):
-    enriched = validate_and_enrich_anexo1(payload)
+    with stage("validate"):
+        enriched = validate_and_enrich_anexo1(payload)
     return enriched
 
 @app.post("/api/anexo2/preview")
 def preview_anexo2(payload: dict):
-    enriched = validate_and_enrich_anexo2(payload)
+    with stage("validate"):
+        enriched = validate_and_enrich_anexo2(payload)
     return enriched
 
 
-@app.post("/api/anexo2/prefill-from-anexo1")
-async def prefill_anexo2_from_anexo1(file: UploadFile = File(...)):
-    if not file.filename:
-        raise HTTPException(400, "Envie o arquivo do Anexo I preenchido em PDF, DOC ou DOCX.")
+async def _cancel_on_disconnect(request: Request, coro):
+    """Executa `coro` e a cancela se o cliente desconectar antes do fim."""
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=0.5)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise HTTPException(499, "Requisição cancelada pelo cliente.")
+    finally:
+        if not task.done():
+            task.cancel()
 
-    suffix = Path(file.filename).suffix.lower()
-    if suffix not in (".pdf", ".docx", ".doc"):
-        raise HTTPException(400, "Formato não suportado. Use PDF, DOC ou DOCX do Anexo I.")
 
-    content = await file.read()
-    if not content:
-        raise HTTPException(400, "Arquivo vazio. Verifique se o Anexo I foi exportado corretamente.")
+async def _with_timeout(coro, timeout: float, stage: str):
+    try:
+        return await asyncio.wait_for(coro, timeout=timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(504, f"Tempo esgotado na etapa de {stage}. Tente novamente.")
 
-    tmp_path = None
+
+async def _parse_isolated(path: Path) -> dict:
+    """
+    Interpreta o arquivo no pool de leitura (processos com limite de CPU e
+    memória). O .doc é convertido antes, aqui, pelo pool do LibreOffice.
+    """
+    if path.suffix.lower() != ".doc":
+        with stage("extract"):
+            return await run_in_parse_pool(parse_doc_to_json, path)
+
+    workdir = Path(mkdtemp())
+    try:
+        try:
+            with stage("convert"):
+                pdf_path = await convert_to_pdf_async(path, workdir)
+        except (OSError, RuntimeError, subprocess.SubprocessError, asyncio.TimeoutError) as exc:
+            raise ValueError("Falha ao converter arquivo para PDF. Verifique se o DOC/DOCX está legível.") from exc
+        with stage("extract"):
+            return await run_in_parse_pool(parse_doc_to_json, pdf_path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# o corpo é lido pelo handler (receive_upload); aqui só a documentação do formulário
+_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                },
+            },
+        },
+    },
+}
+
+
+async def _receive_anexo1(request: Request) -> ReceivedUpload:
+    # corpo declarado já acima do limite: recusa sem ler nada
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > settings.upload_max_bytes + 64 * 1024:
+        raise HTTPException(413, f"Arquivo muito grande. O limite é de {settings.upload_max_bytes // (1024 * 1024)} MB.")
     try:
-        with NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(content)
-            tmp_path = Path(tmp.name)
+        upload = await receive_upload(request, "file", (".pdf", ".docx", ".doc"), settings.upload_max_bytes)
+    except UploadTooLargeError as exc:
+        raise HTTPException(413, str(exc))
+    except UploadFormatError as exc:
+        raise HTTPException(400, str(exc))
+    UPLOAD_BYTES.observe(upload.size)
+    return upload
 
-        result = extract_prefill_from_anexo1(tmp_path)
+
+async def _parse_anexo1_upload(upload: ReceivedUpload) -> dict:
+    """Lê o Anexo I enviado; o mesmo arquivo (mesmo hash) é interpretado uma vez só."""
+    tmp_path = upload.path
+    try:
+        cache = get_parse_cache()
+        key = f"{upload.suffix}:{upload.digest}"
+        parsed = cache.get(key) if cache else None
+        if parsed is not None:
+            return parsed
+
+        parsed = await _with_timeout(
+            _parse_isolated(tmp_path),
+            settings.prefill_timeout_s,
+            "leitura do Anexo I",
+        )
+    except HTTPException:
+        raise
     except ValueError as exc:
         raise HTTPException(400, str(exc))
+    except ParseLimitExceeded:
+        raise HTTPException(422, "O arquivo excedeu os limites de processamento. Envie um Anexo I menor ou sem anexos.")
     except Exception:
         raise HTTPException(400, "Não foi possível extrair dados do Anexo I. Confirme se o arquivo está legível.")
     finally:
-        if tmp_path:
-            tmp_path.unlink(missing_ok=True)
+        tmp_path.unlink(missing_ok=True)
 
-    return {"ok": True, "prefill": result.prefill, "warnings": result.warnings, "filename": file.filename}
+    if cache and parsed:
+        cache.put(key, parsed)
+    return parsed
 
 
-@app.post("/api/anexo1/prefill-from-anexo1")
-async def prefill_anexo1_from_anexo1(file: UploadFile = File(...)):
-    if not file.filename:
-        raise HTTPException(400, "Envie o arquivo do Anexo I preenchido em PDF, DOC ou DOCX.")
+@app.post("/api/anexo2/prefill-from-anexo1", openapi_extra=_UPLOAD_OPENAPI)
+async def prefill_anexo2_from_anexo1(request: Request):
+    upload = await _receive_anexo1(request)
+    parsed = await _parse_anexo1_upload(upload)
+    try:
+        result = prefill_anexo2_from_parsed(parsed)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
 
-    suffix = Path(file.filename).suffix.lower()
-    if suffix not in (".pdf", ".docx", ".doc"):
-        raise HTTPException(400, "Formato não suportado. Use PDF, DOC ou DOCX do Anexo I.")
+    return {"ok": True, "prefill": result.prefill, "warnings": result.warnings, "filename": upload.filename}
 
-    content = await file.read()
-    if not content:
-        raise HTTPException(400, "Arquivo vazio. Verifique se o Anexo I foi exportado corretamente.")
 
-    tmp_path = None
+@app.post("/api/anexo1/prefill-from-anexo1", openapi_extra=_UPLOAD_OPENAPI)
+async def prefill_anexo1_from_anexo1(request: Request):
+    upload = await _receive_anexo1(request)
+    parsed = await _parse_anexo1_upload(upload)
     try:
-        with NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(content)
-            tmp_path = Path(tmp.name)
-
-        result = extract_prefill_for_anexo1(tmp_path)
+        result = prefill_anexo1_from_parsed(parsed)
     except ValueError as exc:
         raise HTTPException(400, str(exc))
-    except Exception:
-        raise HTTPException(400, "Não foi possível extrair dados do Anexo I. Confirme se o arquivo está legível.")
-    finally:
-        if tmp_path:
-            tmp_path.unlink(missing_ok=True)
 
-    return {"ok": True, "prefill": result.prefill, "warnings": result.warnings, "filename": file.filename}
+    return {"ok": True, "prefill": result.prefill, "warnings": result.warnings, "filename": upload.filename}
 
-@app.post("/api/anexo1/generate")
-def generate_anexo1(payload: dict, format: Literal["docx", "pdf"] = Query("docx")):
-    _ensure_data_dir()
 
-    enriched = validate_and_enrich_anexo1(payload)
-    if not enriched.get("ok"):
-        # 422 Unprocessable Entity (erro de validação)
-        raise HTTPException(status_code=422, detail=enriched)
+def _cleanup(files: list[Path]) -> None:
+    for f in files:
+        f.unlink(missing_ok=True)
 
-    template = settings.templates_dir / "anexo1_template.docx"
-    if not template.exists():
-        raise HTTPException(500, "Template anexo1_template.docx não encontrado em app/templates.")
 
+async def _render_document(template: Path, enriched: dict, format: str) -> list[Path]:
+    """
+    Renderiza no pool de processos e, se pedido, converte para PDF.
+    Retorna os arquivos gerados; o último é o que deve ser enviado.
+    """
     with NamedTemporaryFile(delete=False, suffix=".docx") as tmp_docx:
         out_docx = Path(tmp_docx.name)
 
-    render_docx_from_template(template, out_docx, enriched["placeholders"], rows=enriched.get("rows"))
+    files = [out_docx]
+    try:
+        loop = asyncio.get_running_loop()
+        with stage("render"):
+            await _with_timeout(
+                loop.run_in_executor(
+                    get_render_executor(),
+                    DOCX_RENDERERS[settings.docx_renderer],
+                    template,
+                    out_docx,
+                    enriched["placeholders"],
+                    enriched.get("rows"),
+                ),
+                settings.render_timeout_s,
+                "renderização",
+            )
+        if format == "pdf":
+            # o timeout da conversão é aplicado em convert_docx_to_pdf_async (mata o soffice)
+            try:
+                with stage("convert"):
+                    files.append(await convert_docx_to_pdf_async(out_docx))
+            except asyncio.TimeoutError:
+                raise HTTPException(504, "Tempo esgotado na etapa de conversão para PDF. Tente novamente.")
+    except BaseException:
+        _cleanup(files + [out_docx.with_suffix(".pdf")])
+        raise
+    return files
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def _serve_document(request: Request, kind: str, template: Path, enriched: dict, format: str) -> Response:
+    filename = f"{kind}_preenchido.{format}"
+    cache = get_output_cache()
+    if cache is None:
+        files = await _cancel_on_disconnect(request, _render_document(template, enriched, format))
+        return FileResponse(files[-1], filename=filename, background=BackgroundTask(_cleanup, files))
+
+    # mesmo conteúdo + mesmo template = mesmo arquivo; repetições saem direto do cache.
+    # O ETag só identifica o conteúdo: POST não é condicional (If-None-Match é ignorado)
+    key = cache_key(kind, template, enriched["placeholders"], enriched.get("rows"))
+    headers = {"ETag": etag_for(key, format), "Cache-Control": "private, no-cache"}
+
+    # get/put devolvem um link próprio: despejos concorrentes não apagam o arquivo antes do envio
+    cached = await run_in_threadpool(cache.get, key, format)
+    if cached is None:
+        files = await _cancel_on_disconnect(request, _render_document(template, enriched, format))
+        try:
+            cached = await run_in_threadpool(cache.put, key, format, files[-1])
+            if format == "pdf":
+                await run_in_threadpool(cache.put, key, "docx", files[0], link=False)
+        finally:
+            _cleanup(files)
+
+    return FileResponse(cached, filename=filename, headers=headers, background=BackgroundTask(_cleanup, [cached]))
+
+
+async def _run_job(kind: str, format: str, enriched: dict, dest: Path) -> None:
+    """Executa um job da fila: mesmo caminho (e mesmo cache) da geração síncrona."""
+    template = settings.templates_dir / f"{kind}_template.docx"
+    cache = get_output_cache()
+    key = cache_key(kind, template, enriched["placeholders"], enriched.get("rows")) if cache else None
+    cached = await run_in_threadpool(cache.get, key, format) if cache else None
+    if cached is not None:
+        await run_in_threadpool(shutil.move, str(cached), dest)
+        return
 
-    def cleanup(files: list[Path]):
-        for f in files:
-            f.unlink(missing_ok=True)
+    files = await _render_document(template, enriched, format)
+    try:
+        if cache:
+            await run_in_threadpool(cache.put, key, format, files[-1], link=False)
+            if format == "pdf":
+                await run_in_threadpool(cache.put, key, "docx", files[0], link=False)
+        await run_in_threadpool(shutil.move, str(files[-1]), dest)
+    finally:
+        _cleanup(files)
 
-    if format == "docx":
-        return FileResponse(
-            out_docx,
-            filename="anexo1_preenchido.docx",
-            background=BackgroundTask(cleanup, [out_docx]),
+
+def _submit_job(kind: str, enriched: dict, format: str) -> JSONResponse:
+    try:
+        job = _jobs.submit(kind, format, enriched)
+    except QueueFullError:
+        raise HTTPException(
+            429,
+            "Muitas solicitações na fila. Tente novamente em instantes.",
+            headers={"Retry-After": str(settings.jobs_retry_after_s)},
         )
+    body = job.public()
+    body["status_url"] = f"/api/jobs/{job.id}"
+    body["download_url"] = f"/api/jobs/{job.id}/download"
+    return JSONResponse(body, status_code=202, headers={"Location": body["status_url"]})
 
-    out_pdf = convert_docx_to_pdf(out_docx)
 
-    return FileResponse(
-        out_pdf,
-        filename="anexo1_preenchido.pdf",
-        background=BackgroundTask(cleanup, [out_docx, out_pdf]),
-    )
+@app.post("/api/anexo1/generate")
+async def generate_anexo1(
+    request: Request,
+    payload: dict,
+    format: Literal["docx", "pdf"] = Query("docx"),
+    async_: bool = Query(False, alias="async"),
+):
+    with stage("validate"):
+        enriched = validate_and_enrich_anexo1(payload)
+    if not enriched.get("ok"):
+        # 422 Unprocessable Entity (erro de validação)
+        raise HTTPException(status_code=422, detail=enriched)
+
+    template = settings.templates_dir / "anexo1_template.docx"
+    if not template.exists():
+        raise HTTPException(500, "Template anexo1_template.docx não encontrado em app/templates.")
 
+    if async_:
+        return _submit_job("anexo1", enriched, format)
+    return await _serve_document(request, "anexo1", template, enriched, format)
 
-@app.post("/api/anexo2/generate")
-def generate_anexo2(payload: dict, format: Literal["docx", "pdf"] = Query("docx")):
-    _ensure_data_dir()
 
-    enriched = validate_and_enrich_anexo2(payload)
+@app.post("/api/anexo2/generate")
+async def generate_anexo2(
+    request: Request,
+    payload: dict,
+    format: Literal["docx", "pdf"] = Query("docx"),
+    async_: bool = Query(False, alias="async"),
+):
+    with stage("validate"):
+        enriched = validate_and_enrich_anexo2(payload)
     if not enriched.get("ok"):
         raise HTTPException(status_code=422, detail=enriched)
 
@@ -220,30 +555,137 @@ def generate_anexo2(payload: dict, format: Literal["docx", "pdf"] = Query("docx"
     if not template.exists():
         raise HTTPException(500, "Template anexo2_template.docx não encontrado em app/templates.")
 
-    with NamedTemporaryFile(delete=False, suffix=".docx") as tmp_docx:
-        out_docx = Path(tmp_docx.name)
+    if async_:
+        return _submit_job("anexo2", enriched, format)
+    return await _serve_document(request, "anexo2", template, enriched, format)
 
-    render_docx_from_template(template, out_docx, enriched["placeholders"], rows=enriched.get("rows"))
 
-    def cleanup(files: list[Path]):
-        for f in files:
-            f.unlink(missing_ok=True)
+def _get_job(job_id: str):
+    job = _jobs.get(job_id) if len(job_id) == 32 and job_id.isalnum() else None
+    if job is None:
+        raise HTTPException(404, "Job não encontrado.")
+    return job
+
+
+@app.get("/api/jobs/{job_id}")
+def job_status(job_id: str):
+    return _get_job(job_id).public()
 
+
+@app.get("/api/jobs/{job_id}/download")
+def job_download(job_id: str):
+    job = _get_job(job_id)
+    if job.status == "failed":
+        raise HTTPException(422, job.error or "Falha ao gerar o documento.")
+    path = _jobs.result_path(job)
+    if path is None:
+        raise HTTPException(
+            409,
+            "Documento ainda não está pronto.",
+            headers={"Retry-After": "2"},
+        )
+    return FileResponse(path, filename=job.filename)
+
+async def _render_batch(kind: str, template: Path, items: list[tuple[int, dict]], format: str, workdir: Path) -> dict[int, Optional[Path]]:
+    """Renderiza os itens em paralelo e converte todos os DOCX numa única chamada do soffice."""
+    loop = asyncio.get_running_loop()
+    executor = get_render_executor()
+    renderer = DOCX_RENDERERS[settings.docx_renderer]
+    docx_paths = {i: workdir / f"{kind}_{i + 1:03d}.docx" for i, _ in items}
+
+    rounds = -(-len(items) // max(1, settings.render_workers))
+    # no lote as etapas medem o lote inteiro (stage render_batch / convert_batch)
+    with stage("render_batch"):
+        await _with_timeout(
+            asyncio.gather(*(
+                loop.run_in_executor(executor, renderer, template, docx_paths[i], enriched["placeholders"], enriched.get("rows"))
+                for i, enriched in items
+            )),
+            settings.render_timeout_s * max(1, rounds),
+            "renderização",
+        )
     if format == "docx":
-        return FileResponse(
-            out_docx,
-            filename="anexo2_preenchido.docx",
-            background=BackgroundTask(cleanup, [out_docx]),
+        return dict(docx_paths)
+
+    try:
+        with stage("convert_batch"):
+            pdfs = await convert_many_to_pdf_async(list(docx_paths.values()), workdir)
+    except asyncio.TimeoutError:
+        raise HTTPException(504, "Tempo esgotado na etapa de conversão para PDF. Tente novamente.")
+    return dict(zip(docx_paths, pdfs))
+
+
+def _write_batch_zip(zip_path: Path, files: list[Path], report: list[dict]) -> None:
+    # DOCX/PDF já são comprimidos; só o relatório passa pelo deflate
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        for f in files:
+            zf.write(f, arcname=f.name)
+        zf.writestr(
+            "relatorio.json",
+            json.dumps(report, ensure_ascii=False, indent=2),
+            compress_type=zipfile.ZIP_DEFLATED,
         )
 
-    out_pdf = convert_docx_to_pdf(out_docx)
+
+async def _generate_batch(request: Request, kind: str, validate, payloads: list[dict], format: str) -> FileResponse:
+    if not payloads:
+        raise HTTPException(400, "Envie ao menos um formulário no lote.")
+    if len(payloads) > settings.batch_max_items:
+        raise HTTPException(413, f"O lote aceita no máximo {settings.batch_max_items} formulários.")
+
+    template = settings.templates_dir / f"{kind}_template.docx"
+    if not template.exists():
+        raise HTTPException(500, f"Template {kind}_template.docx não encontrado em app/templates.")
+
+    report: dict[int, dict] = {}
+    valid: list[tuple[int, dict]] = []
+    for i, payload in enumerate(payloads):
+        try:
+            with stage("validate"):
+                enriched = validate(payload)
+        except Exception:
+            # um item malformado não derruba o lote inteiro
+            enriched = {"ok": False, "errors": [{"field": "", "message": "Formulário incompleto ou malformado."}]}
+        if enriched.get("ok"):
+            valid.append((i, enriched))
+        else:
+            report[i] = {"index": i, "ok": False, "errors": enriched.get("errors", [])}
+
+    workdir = Path(mkdtemp(prefix=f"{kind}-lote-"))
+    try:
+        outputs = await _cancel_on_disconnect(request, _render_batch(kind, template, valid, format, workdir)) if valid else {}
+        files = []
+        for i, _ in valid:
+            out = outputs.get(i)
+            if out is None:
+                report[i] = {"index": i, "ok": False, "errors": [{"field": "", "message": "Falha ao converter o documento para PDF."}]}
+            else:
+                files.append(out)
+                report[i] = {"index": i, "ok": True, "file": out.name}
+
+        zip_path = workdir / f"{kind}_lote.zip"
+        await run_in_threadpool(_write_batch_zip, zip_path, files, [report[i] for i in sorted(report)])
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
 
     return FileResponse(
-        out_pdf,
-        filename="anexo2_preenchido.pdf",
-        background=BackgroundTask(cleanup, [out_docx, out_pdf]),
+        zip_path,
+        filename=f"{kind}_lote.zip",
+        media_type="application/zip",
+        background=BackgroundTask(shutil.rmtree, workdir, True),
     )
 
+
+@app.post("/api/anexo1/batch")
+async def batch_anexo1(request: Request, payloads: list[dict], format: Literal["docx", "pdf"] = Query("docx")):
+    return await _generate_batch(request, "anexo1", validate_and_enrich_anexo1, payloads, format)
+
+
+@app.post("/api/anexo2/batch")
+async def batch_anexo2(request: Request, payloads: list[dict], format: Literal["docx", "pdf"] = Query("docx")):
+    return await _generate_batch(request, "anexo2", validate_and_enrich_anexo2, payloads, format)
+
 @app.get("/review", response_class=HTMLResponse)
-def review_page():
-    return _load_html("review.html")
+def review_page(request: Request):
+    return _html_page(request, "review.html")
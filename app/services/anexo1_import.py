@@ -1,16 +1,31 @@
 from __future__ import annotations
 
+import logging
 import re
 import shutil
 import subprocess
 import tempfile
+import time
+import zipfile
+from bisect import bisect_right
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import pdfplumber
 from docx import Document
+from lxml import etree
+
+from app.services.pdf_convert import convert_to_pdf
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+_LABEL_ONLY_RE = re.compile(r":\s*$")
+_HSPACE_RE = re.compile(r"[ \t]+")
+_BLANK_LINES_RE = re.compile(r"\n{2,}")
 
 
 def _merge_label_value_lines(text: str) -> str:
@@ -25,7 +40,7 @@ def _merge_label_value_lines(text: str) -> str:
         if ln.endswith(":") and i + 1 < len(lines):
             nxt = lines[i + 1].strip()
             # next line is likely a value (not another label with colon)
-            if nxt and not re.search(r":\s*$", nxt):
+            if nxt and not _LABEL_ONLY_RE.search(nxt):
                 merged.append(f"{ln} {nxt}")
                 skip = True
                 continue
@@ -37,134 +52,226 @@ def normalize_text(s: str) -> str:
     """Normalize doc text before applying regexes."""
     s = s.replace("\r", "\n")
     s = _merge_label_value_lines(s)
-    s = re.sub(r"[ \t]+", " ", s)
-    s = re.sub(r"\n{2,}", "\n", s)
+    s = _HSPACE_RE.sub(" ", s)
+    s = _BLANK_LINES_RE.sub("\n", s)
     return s.strip()
 
 
-def find_one(pattern: str, text: str, flags=re.IGNORECASE) -> Optional[str]:
-    m = re.search(pattern, text, flags)
-    return m.group(1).strip() if m else None
+# Títulos das seções do Anexo I, na ordem do formulário. Cada bloco vai do
+# primeiro título até a primeira ocorrência do título seguinte (o débito do
+# recurso vai até o fim do texto).
+_SECTIONS = (
+    ("identificacao", r"IDENTIFICAÇ[ÃA]O"),
+    ("motivo", r"DESCRIÇ[ÃA]O DO MOTIVO DA VIAGEM:"),
+    ("ida", r"DESTINO\s*\(Ida\):"),
+    ("retorno", r"DESTINO\s*\(Retorno\):"),
+    ("missao", r"DATA/HORA DA MISS[ÃA]O:"),
+    ("debito", r"D[ÉE]BITO DO RECURSO:"),
+)
+
+
+def _alternation(labels: Tuple[Tuple[str, str], ...], suffix: str = "") -> "re.Pattern[str]":
+    # o lookahead com as iniciais deixa o re descartar rápido as posições que
+    # não podem começar um rótulo (com IGNORECASE e grupos nomeados ele não faz isso sozinho)
+    initials = "".join(sorted({c for _, pat in labels for c in (pat[0].lower(), pat[0].upper())}))
+    body = "|".join(f"(?P<{name}>{pat}){suffix}" for name, pat in labels)
+    return re.compile(f"(?=[{initials}])(?:{body})", re.IGNORECASE)
+
 
+_SECTION_RE = _alternation(_SECTIONS)
+
+# Os campos saem de blocos pequenos; texto além disso (colagens, lixo de OCR)
+# não é examinado, o que limita o custo de qualquer regex sobre o bloco.
+_MAX_SECTION_CHARS = 5000
 
 STOP_LABELS_PATTERN = (
     r"(?:Nome completo|Cargo ou Fun[cç][ãa]o que Ocupa|CPF|RG|Data de Nascimento|"
     r"Siape|Nome da M[ãa]e|Endere[cç]o|Telefone|Email|Dados Banc[aá]rios|Banco|Ag[êe]ncia|Conta)\s*:"
 )
+_STOP_LABELS_RE = re.compile("(?=[ABCDERSTNabcdenrst])" + STOP_LABELS_PATTERN, re.IGNORECASE)
+
+_IDENT_LABELS = (
+    ("nome_completo", r"Nome completo"),
+    ("cargo_funcao", r"Cargo ou Fun[cç][aã]o que Ocupa"),
+    ("cpf", r"CPF"),
+    ("rg", r"RG"),
+    ("data_nascimento", r"Data de Nascimento"),
+    ("siape", r"Siape"),
+    ("nome_mae", r"Nome da M[ãa]e"),
+    ("endereco", r"Endere[cç]o"),
+    ("telefone", r"Telefone"),
+    ("email", r"Email"),
+    ("banco", r"Banco"),
+    ("agencia", r"Ag[êe]ncia"),
+    ("conta", r"Conta"),
+)
+_IDENT_LABEL_RE = _alternation(_IDENT_LABELS, suffix=":")
+
+# usados só quando o rótulo existe mas o valor não foi separado
+_IDENT_FALLBACK_RE = {
+    "cpf": re.compile(r"CPF:\s*([0-9\.\-]{11,14}|\d{11})", re.IGNORECASE),
+    "rg": re.compile(r"RG:\s*([0-9\.\-]+)", re.IGNORECASE),
+    "data_nascimento": re.compile(r"Data de Nascimento:\s*([0-3]\d/[0-1]\d/\d{4})", re.IGNORECASE),
+    "siape": re.compile(r"Siape:\s*(\d+)", re.IGNORECASE),
+    "telefone": re.compile(r"Telefone:\s*([\d\(\)\-\s]+)", re.IGNORECASE),
+    "email": re.compile(r"Email:\s*([^\s]+@[^\s]+)", re.IGNORECASE),
+    "banco": re.compile(r"Banco:\s*([A-Za-z0-9]+)", re.IGNORECASE),
+    "agencia": re.compile(r"Ag[êe]ncia:\s*([0-9]+)", re.IGNORECASE),
+    "conta": re.compile(r"Conta:\s*([0-9]+)", re.IGNORECASE),
+}
+_EMAIL_TRAILING_LABEL_RE = re.compile(r"\s*Dados Banc[aá]rios:\s*$", re.IGNORECASE)
+
+_DATETIME = r"[0-3]\d/[0-1]\d/\d{4}\s+\d{2}:\d{2}"
+_ORIGEM_LABEL_RE = re.compile(r"Local\s+de\s+Origem:", re.IGNORECASE)
+_DESTINO_LABEL_RE = re.compile(r"Local\s+de\s+Destino:", re.IGNORECASE)
+_ORIGEM_RE = re.compile(r"Local\s+de\s+Origem:\s*(.+)", re.IGNORECASE | re.DOTALL)
+_DESTINO_LOCAL_RE = re.compile(r"Local\s+de\s+Destino:\s*(.+)", re.IGNORECASE | re.DOTALL)
+_DATA_HORA_RE = re.compile(rf"Data\s*/?\s*Hora:\s*({_DATETIME})", re.IGNORECASE)
+_MISSAO_INICIO_RE = re.compile(rf"Data/Hora In[ií]cio:\s*({_DATETIME})", re.IGNORECASE)
+_MISSAO_TERMINO_RE = re.compile(rf"Data/Hora T[eé]rmino:\s*({_DATETIME})", re.IGNORECASE)
+
+_DEBITO_MARKED_RE = (
+    ("CCHSA", re.compile(r"\(\s*[xX]\s*\)\s*CCHSA\b")),
+    ("CAVN", re.compile(r"\(\s*[xX]\s*\)\s*CAVN\b")),
+    ("PROJETO", re.compile(r"\(\s*[xX]\s*\)\s*PROJETO\b")),
+)
+_DEBITO_OUTROS_MARKED_RE = re.compile(r"\(\s*[xX]\s*\)\s*Outros:\s*(.+)", re.IGNORECASE)
+_DEBITO_OUTROS_RE = re.compile(r"Outros:\s*(.+)", re.IGNORECASE)
 
 
-def find_with_stop(label_regex: str, text: str) -> Optional[str]:
-    """
-    Capture value after label until the next known label (or end).
-    Helps when DOCX coloca vários campos na mesma linha.
-    """
-    pattern = rf"{label_regex}:\s*(.+?)\s*(?={STOP_LABELS_PATTERN}|$)"
-    m = re.search(pattern, text, flags=re.IGNORECASE | re.DOTALL)
+def _group(pattern: "re.Pattern[str]", text: str) -> Optional[str]:
+    m = pattern.search(text)
     return m.group(1).strip() if m else None
 
 
-def find_block(start_pat: str, end_pat: str, text: str) -> Optional[str]:
-    m = re.search(start_pat + r"(.*?)" + end_pat, text, flags=re.IGNORECASE | re.DOTALL)
-    return m.group(1).strip() if m else None
+def split_sections(text: str) -> Dict[str, Optional[str]]:
+    """Separa o texto normalizado nos blocos do formulário, numa única varredura."""
+    found: Dict[str, List[Tuple[int, int]]] = {name: [] for name, _ in _SECTIONS}
+    for m in _SECTION_RE.finditer(text):
+        found[m.lastgroup].append(m.span())
 
+    sections: Dict[str, Optional[str]] = {}
+    names = [name for name, _ in _SECTIONS]
+    for i, name in enumerate(names):
+        if not found[name]:
+            sections[name] = None
+            continue
+        start = found[name][0][1]
+        if i + 1 == len(names):
+            end = len(text)
+        else:
+            end = next((s for s, _ in found[names[i + 1]] if s >= start), None)
+            if end is None:
+                sections[name] = None
+                continue
+        sections[name] = text[start:end].strip()
+    return sections
 
-def parse_debito_recurso(text: str) -> Optional[str]:
-    block = find_block(r"D[ÉE]BITO DO RECURSO:\s*", r"$", text) or ""
 
-    if re.search(r"\(\s*[xX]\s*\)\s*CCHSA\b", block):
-        return "CCHSA"
-    if re.search(r"\(\s*[xX]\s*\)\s*CAVN\b", block):
-        return "CAVN"
-    if re.search(r"\(\s*[xX]\s*\)\s*PROJETO\b", block):
-        return "PROJETO"
+def _section(sections: Dict[str, Optional[str]], name: str) -> str:
+    return (sections.get(name) or "")[:_MAX_SECTION_CHARS]
 
-    m_outros = re.search(r"\(\s*[xX]\s*\)\s*Outros:\s*(.+)", block, flags=re.IGNORECASE)
+
+def _label_values(block: str) -> Dict[str, Optional[str]]:
+    """
+    Valor de cada rótulo da identificação: do primeiro "Rótulo:" até o próximo
+    rótulo conhecido (ou o fim do bloco). Várias colunas na mesma linha do DOCX
+    ficam separadas assim.
+    """
+    stops = [m.start() for m in _STOP_LABELS_RE.finditer(block)]
+    values: Dict[str, Optional[str]] = {}
+    for m in _IDENT_LABEL_RE.finditer(block):
+        name = m.lastgroup
+        if name in values:
+            continue
+        pos = m.end()
+        while pos < len(block) and block[pos].isspace():
+            pos += 1
+        if pos == len(block):
+            values[name] = "" if pos > m.end() else None
+            continue
+        # o valor tem ao menos um caractere; o próximo rótulo vem depois dele
+        i = bisect_right(stops, pos)
+        end = stops[i] if i < len(stops) else len(block)
+        values[name] = block[pos:end].strip()
+    return values
+
+
+def parse_debito_recurso(sections: Dict[str, Optional[str]]) -> Optional[str]:
+    block = _section(sections, "debito")
+
+    for value, pattern in _DEBITO_MARKED_RE:
+        if pattern.search(block):
+            return value
+
+    m_outros = _DEBITO_OUTROS_MARKED_RE.search(block)
     if m_outros:
         val = m_outros.group(1).strip()
         return f"OUTROS: {val}" if val else "OUTROS"
 
-    m_outros2 = re.search(r"Outros:\s*(.+)", block, flags=re.IGNORECASE)
+    m_outros2 = _DEBITO_OUTROS_RE.search(block)
     if m_outros2 and m_outros2.group(1).strip():
         return f"OUTROS: {m_outros2.group(1).strip()}"
     return None
 
 
-def parse_destino(text: str, tipo: str) -> Dict[str, Optional[str]]:
-    if tipo.lower() == "ida":
-        block = find_block(r"DESTINO\s*\(Ida\):\s*", r"DESTINO\s*\(Retorno\):", text) or ""
-    else:
-        block = find_block(r"DESTINO\s*\(Retorno\):\s*", r"DATA/HORA DA MISS[ÃA]O:", text) or ""
-
-    pattern = (
-        r"Local\s+de\s+Origem:\s*(?P<origem>.*?)\s*"
-        r"(?=Local\s+de\s+Destino:)"
-        r"Local\s+de\s+Destino:\s*(?P<destino>.*?)\s*"
-        r"(?=Data\s*/?\s*Hora:)"
-        r"Data\s*/?\s*Hora:\s*(?P<datahora>[0-3]\d/[0-1]\d/\d{4}\s+\d{2}:\d{2})"
-    )
-
-    m = re.search(pattern, block, flags=re.IGNORECASE | re.DOTALL)
-    if not m:
-        origem = find_one(r"Local\s+de\s+Origem:\s*(.+)", block, flags=re.IGNORECASE | re.DOTALL)
-        destino = find_one(r"Local\s+de\s+Destino:\s*(.+)", block, flags=re.IGNORECASE | re.DOTALL)
-        dh = find_one(r"Data\s*/?\s*Hora:\s*([0-3]\d/[0-1]\d/\d{4}\s+\d{2}:\d{2})", block, flags=re.IGNORECASE | re.DOTALL)
+def parse_destino(sections: Dict[str, Optional[str]], tipo: str) -> Dict[str, Optional[str]]:
+    block = _section(sections, "ida" if tipo.lower() == "ida" else "retorno")
+
+    # origem, destino e data/hora nessa ordem: cada busca começa onde a anterior parou
+    # (uma regex só, com os dois valores preguiçosos, retrocede demais com rótulos repetidos)
+    origem_label = _ORIGEM_LABEL_RE.search(block)
+    destino_label = _DESTINO_LABEL_RE.search(block, origem_label.end()) if origem_label else None
+    data_hora = _DATA_HORA_RE.search(block, destino_label.end()) if destino_label else None
+    if data_hora is None:
+        origem = _group(_ORIGEM_RE, block)
+        destino = _group(_DESTINO_LOCAL_RE, block)
+        dh = _group(_DATA_HORA_RE, block)
         return {"local_origem": origem, "local_destino": destino, "data_hora": dh}
 
     return {
-        "local_origem": m.group("origem").strip(),
-        "local_destino": m.group("destino").strip(),
-        "data_hora": m.group("datahora").strip(),
+        "local_origem": block[origem_label.end():destino_label.start()].strip(),
+        "local_destino": block[destino_label.end():data_hora.start()].strip(),
+        "data_hora": data_hora.group(1).strip(),
     }
 
 
-def parse_missao(text: str) -> Dict[str, Optional[str]]:
-    block = find_block(r"DATA/HORA DA MISS[ÃA]O:\s*", r"D[ÉE]BITO DO RECURSO:", text) or ""
-    inicio = find_one(r"Data/Hora In[ií]cio:\s*([0-3]\d/[0-1]\d/\d{4}\s+\d{2}:\d{2})", block, flags=re.IGNORECASE | re.DOTALL)
-    termino = find_one(r"Data/Hora T[eé]rmino:\s*([0-3]\d/[0-1]\d/\d{4}\s+\d{2}:\d{2})", block, flags=re.IGNORECASE | re.DOTALL)
-    return {"inicio": inicio, "termino": termino}
-
-
-def parse_identificacao(text: str) -> Dict[str, Any]:
-    block = find_block(r"IDENTIFICAÇ[ÃA]O\s*", r"DESCRIÇ[ÃA]O DO MOTIVO DA VIAGEM:", text) or ""
+def parse_missao(sections: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+    block = _section(sections, "missao")
+    return {"inicio": _group(_MISSAO_INICIO_RE, block), "termino": _group(_MISSAO_TERMINO_RE, block)}
 
-    nome = find_with_stop(r"Nome completo", block)
-    cargo = find_with_stop(r"Cargo ou Fun[cç][aã]o que Ocupa", block)
 
-    cpf = find_with_stop(r"CPF", block) or find_one(r"CPF:\s*([0-9\.\-]{11,14}|\d{11})", block)
-    rg = find_with_stop(r"RG", block) or find_one(r"RG:\s*([0-9\.\-]+)", block)
+def parse_identificacao(sections: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    block = _section(sections, "identificacao")
+    values = _label_values(block)
 
-    nasc = find_with_stop(r"Data de Nascimento", block) or find_one(r"Data de Nascimento:\s*([0-3]\d/[0-1]\d/\d{4})", block)
-    siape = find_with_stop(r"Siape", block) or find_one(r"Siape:\s*(\d+)", block)
+    def _value(name: str) -> Optional[str]:
+        value = values.get(name)
+        if not value and name in _IDENT_FALLBACK_RE:
+            value = _group(_IDENT_FALLBACK_RE[name], block)
+        return value
 
-    mae = find_with_stop(r"Nome da M[ãa]e", block)
-    endereco = find_with_stop(r"Endere[cç]o", block)
-
-    telefone = find_with_stop(r"Telefone", block) or find_one(r"Telefone:\s*([\d\(\)\-\s]+)", block)
-    email = find_with_stop(r"Email", block) or find_one(r"Email:\s*([^\s]+@[^\s]+)", block)
+    email = _value("email")
     if email:
-        email = re.sub(r"\s*Dados Banc[aá]rios:\s*$", "", email, flags=re.IGNORECASE).strip()
-
-    banco = find_with_stop(r"Banco", block) or find_one(r"Banco:\s*([A-Za-z0-9]+)", block)
-    agencia = find_with_stop(r"Ag[êe]ncia", block) or find_one(r"Ag[êe]ncia:\s*([0-9]+)", block)
-    conta = find_with_stop(r"Conta", block) or find_one(r"Conta:\s*([0-9]+)", block)
+        email = _EMAIL_TRAILING_LABEL_RE.sub("", email).strip()
 
     return {
-        "nome_completo": nome,
-        "cargo_funcao": cargo,
-        "cpf": cpf,
-        "rg": rg,
-        "data_nascimento": nasc,
-        "siape": siape,
-        "nome_mae": mae,
-        "endereco": endereco,
-        "telefone": telefone,
+        "nome_completo": _value("nome_completo"),
+        "cargo_funcao": _value("cargo_funcao"),
+        "cpf": _value("cpf"),
+        "rg": _value("rg"),
+        "data_nascimento": _value("data_nascimento"),
+        "siape": _value("siape"),
+        "nome_mae": _value("nome_mae"),
+        "endereco": _value("endereco"),
+        "telefone": _value("telefone"),
         "email": email,
-        "dados_bancarios": {"banco": banco, "agencia": agencia, "conta": conta},
+        "dados_bancarios": {"banco": _value("banco"), "agencia": _value("agencia"), "conta": _value("conta")},
     }
 
 
-def parse_motivo_viagem(text: str) -> Optional[str]:
-    block = find_block(r"DESCRIÇ[ÃA]O DO MOTIVO DA VIAGEM:\s*", r"DESTINO\s*\(Ida\):", text)
+def parse_motivo_viagem(sections: Dict[str, Optional[str]]) -> Optional[str]:
+    block = sections.get("motivo")
     return block.strip() if block else None
 
 
@@ -182,10 +289,78 @@ def clean(obj: Any) -> Any:
     return obj
 
 
+# a leitura pode parar depois do débito do recurso (último bloco interpretado)
+_PDF_LAST_SECTION_RE = re.compile(r"D[ÉE]BITO DO RECURSO", re.IGNORECASE)
+_PDF_AFTER_LAST_SECTION_RE = re.compile(r"MEIO DE TRANSPORTE", re.IGNORECASE)
+
+
+def _iter_pdf_pages_pdfplumber(path: Path) -> Iterator[str]:
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ""
+            page.close()
+
+
+def _iter_pdf_pages_fast(path: Path) -> Iterator[str]:
+    # texto direto do fluxo de caracteres do PDFium, sem a análise de layout do pdfminer
+    import pypdfium2
+
+    doc = pypdfium2.PdfDocument(str(path))
+    try:
+        for i in range(len(doc)):
+            page = doc[i]
+            textpage = page.get_textpage()
+            try:
+                yield textpage.get_text_range()
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        doc.close()
+
+
+def _iter_pdf_pages(path: Path) -> Iterator[str]:
+    if settings.pdf_extract_mode == "fast":
+        try:
+            import pypdfium2  # noqa: F401
+        except ImportError:
+            logger.warning("pypdfium2 indisponível; usando pdfplumber na leitura do PDF.")
+        else:
+            return _iter_pdf_pages_fast(path)
+    return _iter_pdf_pages_pdfplumber(path)
+
+
+def _has_all_sections(text: str) -> bool:
+    m = _PDF_LAST_SECTION_RE.search(text)
+    return bool(m and _PDF_AFTER_LAST_SECTION_RE.search(text, m.end()))
+
+
 def _extract_text_from_pdf(path: Path) -> str:
+    """
+    Lê as páginas até ter todos os blocos usados pelos parse_*; anexos
+    colados depois do formulário não são lidos. Também para no limite de
+    páginas e quando o tempo de leitura estoura.
+    """
+    deadline = time.monotonic() + settings.pdf_extract_time_budget_s
     try:
-        with pdfplumber.open(path) as pdf:
-            pages = [page.extract_text() or "" for page in pdf.pages]
+        pages: List[str] = []
+        last_section_page = None
+        pages_iter = _iter_pdf_pages(path)
+        try:
+            for text in pages_iter:
+                pages.append(text)
+                if last_section_page is None and _PDF_LAST_SECTION_RE.search(text):
+                    last_section_page = len(pages)
+                joined = "\n".join(pages)
+                if _has_all_sections(joined):
+                    break
+                # débito do recurso no fim de uma página: as opções vêm na seguinte
+                if last_section_page is not None and len(pages) > last_section_page:
+                    break
+                if len(pages) >= settings.pdf_extract_max_pages or time.monotonic() > deadline:
+                    break
+        finally:
+            pages_iter.close()
         text = "\n".join(pages).strip()
         if not text:
             raise ValueError("PDF sem texto. Envie um PDF que não seja imagem/scan.")
@@ -194,22 +369,89 @@ def _extract_text_from_pdf(path: Path) -> str:
         raise ValueError("Falha ao ler PDF. Certifique-se de que é um PDF com texto.") from exc
 
 
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P = _W_NS + "p"
+_W_T = _W_NS + "t"
+_W_TC = _W_NS + "tc"
+_W_TR = _W_NS + "tr"
+_W_BREAKS = (_W_NS + "br", _W_NS + "cr")
+_W_TAB = _W_NS + "tab"
+
+
+def _paragraph_text(p) -> str:
+    parts = []
+    for el in p.iter(_W_T, _W_TAB, *_W_BREAKS):
+        if el.tag == _W_T:
+            parts.append(el.text or "")
+        elif el.tag == _W_TAB:
+            parts.append("\t")
+        else:
+            parts.append("\n")
+    return "".join(parts)
+
+
+def _extract_text_from_docx(path: Path) -> str:
+    """
+    Lê o texto direto do word/document.xml, numa passada (iterparse).
+
+    Reproduz o layout do texto do PDF: cada parágrafo numa linha, cada linha
+    de tabela numa linha (células separadas por espaço) e os parágrafos de
+    uma mesma célula em linhas próprias.
+    """
+    lines: List[str] = []
+    rows: List[List[str]] = []  # linhas de tabela abertas (aninhadas)
+    cells: List[List[str]] = []  # células abertas; recebem os parágrafos
+
+    def _emit(text: str) -> None:
+        (cells[-1] if cells else lines).append(text)
+
+    try:
+        with zipfile.ZipFile(path) as zf, zf.open("word/document.xml") as fh:
+            for event, el in etree.iterparse(fh, events=("start", "end"), tag=(_W_P, _W_TC, _W_TR)):
+                if event == "start":
+                    if el.tag == _W_TR:
+                        rows.append([])
+                    elif el.tag == _W_TC:
+                        cells.append([])
+                    continue
+
+                if el.tag == _W_P:
+                    text = _paragraph_text(el)
+                    # dentro de célula, parágrafos vazios só afastariam o valor do rótulo
+                    if text.strip() or not cells:
+                        _emit(text)
+                elif el.tag == _W_TC:
+                    rows[-1].append("\n".join(cells.pop()))
+                else:
+                    _emit(" ".join(rows.pop()))
+                # parágrafos já lidos saem da árvore (inclusive os de caixas de texto)
+                el.clear(keep_tail=True)
+    except (KeyError, OSError, zipfile.BadZipFile, etree.XMLSyntaxError) as exc:
+        raise ValueError("Falha ao ler DOCX. Verifique se o arquivo está legível.") from exc
+
+    text = "\n".join(lines).strip()
+    if not text:
+        raise ValueError("DOCX sem texto.")
+    return text
+
+
 def _convert_to_pdf(path: Path) -> Path:
     tmpdir = Path(tempfile.mkdtemp())
-    out_path = tmpdir / f"{path.stem}.pdf"
-    cmd = ["soffice", "--headless", "--convert-to", "pdf", "--outdir", str(tmpdir), str(path)]
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    if result.returncode != 0 or not out_path.exists():
+    try:
+        return convert_to_pdf(path, tmpdir)
+    except (OSError, RuntimeError, subprocess.SubprocessError) as exc:
         shutil.rmtree(tmpdir, ignore_errors=True)
-        raise ValueError("Falha ao converter arquivo para PDF. Verifique se o DOC/DOCX está legível.")
-    return out_path
+        raise ValueError("Falha ao converter arquivo para PDF. Verifique se o DOC/DOCX está legível.") from exc
 
 
 def _extract_text(source: Path) -> str:
     suffix = source.suffix.lower()
     if suffix == ".pdf":
         return normalize_text(_extract_text_from_pdf(source))
-    if suffix in (".docx", ".doc"):
+    if suffix == ".docx":
+        return normalize_text(_extract_text_from_docx(source))
+    if suffix == ".doc":
+        # .doc (binário) ainda passa pelo LibreOffice
         pdf_path = _convert_to_pdf(source)
         try:
             return normalize_text(_extract_text_from_pdf(pdf_path))
@@ -220,14 +462,18 @@ def _extract_text(source: Path) -> str:
 
 
 def parse_doc_to_json(source: Path | str) -> Dict[str, Any]:
-    text = _extract_text(Path(source))
+    return parse_text_to_json(_extract_text(Path(source)))
+
+
+def parse_text_to_json(text: str) -> Dict[str, Any]:
+    sections = split_sections(text)
     data = {
-        "identificacao": parse_identificacao(text),
-        "motivo_viagem": parse_motivo_viagem(text),
-        "destino_ida": parse_destino(text, "Ida"),
-        "destino_retorno": parse_destino(text, "Retorno"),
-        "missao": parse_missao(text),
-        "debito_recurso": parse_debito_recurso(text),
+        "identificacao": parse_identificacao(sections),
+        "motivo_viagem": parse_motivo_viagem(sections),
+        "destino_ida": parse_destino(sections, "Ida"),
+        "destino_retorno": parse_destino(sections, "Retorno"),
+        "missao": parse_missao(sections),
+        "debito_recurso": parse_debito_recurso(sections),
     }
     return clean(data)
 
@@ -338,7 +584,10 @@ class Anexo1PrefillResult:
 
 
 def extract_prefill_from_anexo1(source: Path | str) -> Anexo1PrefillResult:
-    parsed = parse_doc_to_json(source)
+    return prefill_anexo2_from_parsed(parse_doc_to_json(source))
+
+
+def prefill_anexo2_from_parsed(parsed: Dict[str, Any]) -> Anexo1PrefillResult:
     if not parsed:
         raise ValueError("Não foi possível interpretar o documento.")
 
@@ -460,7 +709,10 @@ class Anexo1SelfPrefillResult:
 
 
 def extract_prefill_for_anexo1(source: Path | str) -> Anexo1SelfPrefillResult:
-    parsed = parse_doc_to_json(source)
+    return prefill_anexo1_from_parsed(parse_doc_to_json(source))
+
+
+def prefill_anexo1_from_parsed(parsed: Dict[str, Any]) -> Anexo1SelfPrefillResult:
     if not parsed:
         raise ValueError("Não foi possível interpretar o documento.")
 
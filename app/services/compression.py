@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.static_assets import accepted_encodings
+
+# só texto; DOCX/PDF/ZIP (já comprimidos) e imagens passam direto
+COMPRESSIBLE_TYPES = frozenset({
+    "application/json",
+    "application/javascript",
+    "text/css",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+})
+
+
+class CompressionMiddleware:
+    """
+    gzip das respostas de texto (JSON do preview, rascunhos...) acima de
+    `minimum_size` bytes. Respostas com Content-Encoding (estáticos e páginas
+    pré-comprimidos) e tipos fora de COMPRESSIBLE_TYPES não são tocadas.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, level: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.level <= 0:
+            await self.app(scope, receive, send)
+            return
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if not {"gzip", "*"} & accepted:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _GzipResponder(send, self.minimum_size, self.level).send)
+
+
+class _GzipResponder:
+    def __init__(self, send: Send, minimum_size: int, level: int):
+        self._send = send
+        self.minimum_size = minimum_size
+        self.level = level
+        self.start: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    def _should_compress(self, headers: MutableHeaders, body: bytes, more_body: bool) -> bool:
+        if "content-encoding" in headers:
+            return False
+        media_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        if media_type not in COMPRESSIBLE_TYPES:
+            return False
+        return more_body or len(body) >= self.minimum_size
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            # pathsend/trailers: resposta sem corpo em memória, segue como veio
+            if self.start is not None:
+                await self._send(self.start)
+                self.start = None
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(raw=start["headers"])
+            if self._should_compress(headers, body, more_body):
+                self.compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+                headers["Content-Encoding"] = "gzip"
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = self.compressor.compress(body) + self.compressor.flush()
+                    headers["Content-Length"] = str(len(body))
+                    await self._send(start)
+                    await self._send({"type": "http.response.body", "body": body})
+                    return
+            else:
+                self.passthrough = True
+            await self._send(start)
+
+        if self.passthrough:
+            await self._send(message)
+            return
+        data = self.compressor.compress(body)
+        if not more_body:
+            data += self.compressor.flush()
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -0,0 +1,215 @@
+"""
+Templates DOCX compilados: o documento é lido uma vez por mtime e as posições
+dos {{tokens}} e das linhas de trecho ficam registradas. Os dois renderizadores
+(`docx_render`, com python-docx, e `docx_xml_render`, direto no XML) aplicam
+os dados com `fill_body` sobre um <w:body> com a mesma estrutura.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from collections import ChainMap
+from copy import deepcopy
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Set, Tuple
+
+from docx import Document
+from docx.document import Document as DocumentObject
+from docx.oxml.ns import qn
+
+_TOKEN_RE = re.compile(r"\{\{(\w+)\}\}")
+_W_P = qn("w:p")
+_W_TR = qn("w:tr")
+
+def _replace_in_p(p, mapping: Mapping[str, str]) -> None:
+    # Junta runs para evitar placeholder quebrado em runs diferentes
+    runs = p.r_lst
+    full = "".join(r.text for r in runs)
+    if "{{" not in full:
+        return
+
+    # uma passada da regex; cada {{token}} é resolvido por consulta ao dicionário
+    changed = False
+
+    def _sub(match: "re.Match[str]") -> str:
+        nonlocal changed
+        val = mapping.get(match.group(1))
+        if val is None:
+            return match.group(0)
+        changed = True
+        return val
+
+    full = _TOKEN_RE.sub(_sub, full)
+
+    if changed:
+        # limpa runs e coloca tudo no primeiro run
+        for r in runs:
+            r.text = ""
+        if runs:
+            runs[0].text = full
+        else:
+            p.add_r().text = full
+
+def _iter_row_paragraphs(row, seen: Optional[Set[object]] = None):
+    # células mescladas aparecem várias vezes em row.cells; cada <w:tc> é visitado uma vez
+    if seen is None:
+        seen = set()
+    for cell in row.cells:
+        tc = cell._tc
+        if tc in seen:
+            continue
+        seen.add(tc)
+        yield from cell.paragraphs
+
+def _row_has_token(row, token: str) -> bool:
+    for p in _iter_row_paragraphs(row):
+        if token in "".join(run.text for run in p.runs):
+            return True
+    return False
+
+def _row_token_positions(row) -> Tuple[int, ...]:
+    # posições (em tr.iter(w:p)) dos parágrafos da linha que têm {{token}}
+    index = {p: i for i, p in enumerate(row._tr.iter(_W_P))}
+    positions = []
+    for p in _iter_row_paragraphs(row):
+        if p._p in index and _TOKEN_RE.search("".join(run.text for run in p.runs)):
+            positions.append(index[p._p])
+    return tuple(positions)
+
+def _replace_in_tr(tr, positions: Tuple[int, ...], mapping: Mapping[str, str]) -> None:
+    if not positions:
+        return
+    paragraphs = list(tr.iter(_W_P))
+    for i in positions:
+        _replace_in_p(paragraphs[i], mapping)
+
+def _iter_template_paragraphs(doc: DocumentObject):
+    # mesmo alcance da substituição: parágrafos do corpo e células das tabelas
+    yield from doc.paragraphs
+    for table in doc.tables:
+        seen: Set[object] = set()
+        for row in table.rows:
+            yield from _iter_row_paragraphs(row, seen)
+
+
+@dataclass(frozen=True)
+class _TrechoBlock:
+    prefix: str  # "ida" ou "retorno"
+    tr_index: int  # posição do <w:tr> modelo em body.iter(w:tr)
+    data_tr_index: Optional[int]  # linha de data/hora logo abaixo, quando existe
+    positions: Tuple[int, ...]  # parágrafos com token dentro da linha modelo
+    data_positions: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    mtime_ns: int
+    document: DocumentObject  # cópia intocada; cada render trabalha numa deepcopy
+    paragraphs: Tuple[Tuple[int, Tuple[str, ...]], ...]  # (posição em body.iter(w:p), tokens)
+    blocks: Tuple[_TrechoBlock, ...]
+
+
+_compiled: Dict[Path, CompiledTemplate] = {}
+_compiled_lock = threading.Lock()
+
+
+def _compile_template(template_path: Path, mtime_ns: int) -> CompiledTemplate:
+    """Lê o template uma vez e registra onde estão os {{tokens}} e as linhas de trecho."""
+    doc = Document(str(template_path))
+    body = doc.element.body
+    p_index = {p: i for i, p in enumerate(body.iter(_W_P))}
+    tr_index = {tr: i for i, tr in enumerate(body.iter(_W_TR))}
+
+    paragraphs: Dict[int, Tuple[str, ...]] = {}
+    for p in _iter_template_paragraphs(doc):
+        tokens = _TOKEN_RE.findall("".join(run.text for run in p.runs))
+        if tokens:
+            paragraphs.setdefault(p_index[p._p], tuple(dict.fromkeys(tokens)))
+
+    blocks = []
+    for table in doc.tables:
+        rows = table.rows
+        i = 0
+        while i < len(rows):
+            for prefix in ("ida", "retorno"):
+                if _row_has_token(rows[i], "{{%s_origem}}" % prefix):
+                    has_data_row = (i + 1) < len(rows) and _row_has_token(rows[i + 1], "{{%s_data_hora}}" % prefix)
+                    data_row = rows[i + 1] if has_data_row else None
+                    blocks.append(_TrechoBlock(
+                        prefix=prefix,
+                        tr_index=tr_index[rows[i]._tr],
+                        data_tr_index=tr_index[data_row._tr] if data_row is not None else None,
+                        positions=_row_token_positions(rows[i]),
+                        data_positions=_row_token_positions(data_row) if data_row is not None else (),
+                    ))
+                    i += 2 if has_data_row else 1
+                    break
+            else:
+                i += 1
+
+    return CompiledTemplate(
+        mtime_ns=mtime_ns,
+        document=doc,
+        paragraphs=tuple(sorted(paragraphs.items())),
+        blocks=tuple(blocks),
+    )
+
+
+def get_compiled_template(template_path: Path) -> CompiledTemplate:
+    key = template_path.resolve()
+    mtime_ns = key.stat().st_mtime_ns
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+        if compiled is None or compiled.mtime_ns != mtime_ns:
+            compiled = _compile_template(key, mtime_ns)
+            _compiled[key] = compiled
+        return compiled
+
+
+def _expand_trecho_block(block: _TrechoBlock, tr_a, tr_b, items: list, mapping: Mapping[str, str]) -> None:
+    prefix = block.prefix
+    if not items:
+        empty = {f"{prefix}_origem": "", f"{prefix}_destino": "", f"{prefix}_data_hora": ""}
+        items = [empty]
+
+    tmpl_a = deepcopy(tr_a)
+    tmpl_b = deepcopy(tr_b) if tr_b is not None else None
+
+    # a primeira linha usa o próprio modelo; as demais são cópias inseridas logo abaixo
+    prev_tr = None
+    for item in items:
+        row_mapping = ChainMap(item, mapping)
+        if prev_tr is None:
+            new_a, new_b = tr_a, tr_b
+        else:
+            new_a = deepcopy(tmpl_a)
+            prev_tr.addnext(new_a)
+            new_b = None
+            if tmpl_b is not None:
+                new_b = deepcopy(tmpl_b)
+                new_a.addnext(new_b)
+        _replace_in_tr(new_a, block.positions, row_mapping)
+        if new_b is not None:
+            _replace_in_tr(new_b, block.data_positions, row_mapping)
+        prev_tr = new_b if new_b is not None else new_a
+
+
+def fill_body(body, compiled: CompiledTemplate, mapping: Dict[str, str], rows: Optional[Dict[str, list]]) -> None:
+    """Aplica mapping/rows num <w:body> com a mesma estrutura do template compilado."""
+    # resolve as posições antes de inserir linhas novas (os elementos continuam válidos)
+    all_p = list(body.iter(_W_P))
+    targets = [(all_p[i], tokens) for i, tokens in compiled.paragraphs]
+
+    if rows:
+        all_tr = list(body.iter(_W_TR))
+        blocks = [
+            (block, all_tr[block.tr_index], all_tr[block.data_tr_index] if block.data_tr_index is not None else None)
+            for block in compiled.blocks
+        ]
+        for block, tr_a, tr_b in blocks:
+            _expand_trecho_block(block, tr_a, tr_b, rows.get(block.prefix) or [], mapping)
+
+    for p, tokens in targets:
+        if any(key in mapping for key in tokens):
+            _replace_in_p(p, mapping)
@@ -0,0 +1,168 @@
+"""
+Renderização direta no XML do DOCX, sem os wrappers do python-docx.
+
+Só `word/document.xml` é interpretado (lxml) e recomprimido; as demais partes
+do pacote são copiadas byte a byte do template (registro local, dados
+comprimidos e entrada do diretório central), com só o deslocamento corrigido.
+As posições dos {{tokens}} e das linhas de trecho vêm do mesmo template
+compilado usado por `render_docx_from_template`, então o documento gerado é o
+mesmo.
+"""
+from __future__ import annotations
+
+import struct
+import threading
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml.ns import qn
+from docx.oxml.parser import parse_xml
+
+from app.services.docx_template import fill_body, get_compiled_template
+
+# formatos do ZIP (APPNOTE 4.3.7, 4.3.12 e 4.3.16)
+_LOCAL = struct.Struct("<4s5H3L2H")
+_CENTRAL = struct.Struct("<4s6H3L5H2L")
+_END = struct.Struct("<4s4H2LH")
+_LOCAL_SIG = b"PK\x03\x04"
+_CENTRAL_SIG = b"PK\x01\x02"
+_END_SIG = b"PK\x05\x06"
+_DESCRIPTOR_SIG = b"PK\x07\x08"
+_HAS_DESCRIPTOR = 0x08
+_DEFLATED = 8
+
+
+@dataclass(frozen=True)
+class _Member:
+    name: str
+    local: bytes  # registro local inteiro: cabeçalho, nome, extra, dados e descritor
+    central: bytes  # entrada do diretório central, com o deslocamento original
+
+
+@dataclass(frozen=True)
+class _TemplatePackage:
+    mtime_ns: int
+    members: Tuple[_Member, ...]  # na ordem do diretório central
+    comment: bytes
+    document_name: str
+    document_xml: bytes
+
+
+_packages: Dict[Path, _TemplatePackage] = {}
+_packages_lock = threading.Lock()
+
+
+def _read_members(raw: bytes) -> Tuple[Tuple[_Member, ...], bytes]:
+    end = raw.rfind(_END_SIG)
+    if end < 0:
+        raise ValueError("Template DOCX inválido: fim do diretório central não encontrado.")
+    _, disk, _, _, count, _, offset, comment_len = _END.unpack_from(raw, end)
+    if disk != 0 or offset == 0xFFFFFFFF:
+        raise ValueError("Template DOCX em ZIP64 ou em vários volumes não é suportado.")
+
+    members: List[_Member] = []
+    pos = offset
+    for _ in range(count):
+        fields = _CENTRAL.unpack_from(raw, pos)
+        if fields[0] != _CENTRAL_SIG:
+            raise ValueError("Template DOCX inválido: diretório central corrompido.")
+        flags, csize = fields[3], fields[8]
+        name_len, extra_len, comment_len_ = fields[10], fields[11], fields[12]
+        header_offset = fields[16]
+        central_end = pos + _CENTRAL.size + name_len + extra_len + comment_len_
+        name = raw[pos + _CENTRAL.size:pos + _CENTRAL.size + name_len]
+
+        local = _LOCAL.unpack_from(raw, header_offset)
+        data_end = header_offset + _LOCAL.size + local[9] + local[10] + csize
+        if flags & _HAS_DESCRIPTOR:
+            data_end += 16 if raw[data_end:data_end + 4] == _DESCRIPTOR_SIG else 12
+        members.append(_Member(
+            name=name.decode("utf-8" if flags & 0x800 else "cp437"),
+            local=raw[header_offset:data_end],
+            central=raw[pos:central_end],
+        ))
+        pos = central_end
+    return tuple(members), raw[end + _END.size:end + _END.size + comment_len]
+
+
+def _document_xml(member: _Member) -> bytes:
+    local = _LOCAL.unpack_from(member.local)
+    method, csize = local[3], _CENTRAL.unpack_from(member.central)[8]
+    start = _LOCAL.size + local[9] + local[10]
+    data = member.local[start:start + csize]
+    return zlib.decompress(data, -15) if method == _DEFLATED else data
+
+
+def _get_package(template_path: Path, mtime_ns: int, document_name: str) -> _TemplatePackage:
+    key = template_path.resolve()
+    with _packages_lock:
+        package = _packages.get(key)
+        if package is None or package.mtime_ns != mtime_ns:
+            members, comment = _read_members(key.read_bytes())
+            document = next(m for m in members if m.name == document_name)
+            package = _TemplatePackage(mtime_ns, members, comment, document_name, _document_xml(document))
+            _packages[key] = package
+        return package
+
+
+def _replace_document(member: _Member, document_xml: bytes) -> _Member:
+    """Refaz o registro de `word/document.xml` (deflate, sem descritor) a partir do original."""
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    data = compressor.compress(document_xml) + compressor.flush()
+    crc = zlib.crc32(document_xml)
+
+    local = list(_LOCAL.unpack_from(member.local))
+    local[1] = max(local[1], 20)
+    local[2] &= ~_HAS_DESCRIPTOR
+    local[3] = _DEFLATED
+    local[6:9] = [crc, len(data), len(document_xml)]
+    names_end = _LOCAL.size + local[9] + local[10]
+
+    central = list(_CENTRAL.unpack_from(member.central))
+    central[2] = max(central[2], 20)
+    central[3] &= ~_HAS_DESCRIPTOR
+    central[4] = _DEFLATED
+    central[7:10] = [crc, len(data), len(document_xml)]
+
+    return _Member(
+        name=member.name,
+        local=_LOCAL.pack(*local) + member.local[_LOCAL.size:names_end] + data,
+        central=_CENTRAL.pack(*central) + member.central[_CENTRAL.size:],
+    )
+
+
+def _write_package(output_path: Path, package: _TemplatePackage, document_xml: bytes) -> None:
+    locals_: List[bytes] = []
+    centrals: List[bytes] = []
+    offset = 0
+    for member in package.members:
+        if member.name == package.document_name:
+            member = _replace_document(member, document_xml)
+        centrals.append(member.central[:42] + struct.pack("<L", offset) + member.central[46:])
+        locals_.append(member.local)
+        offset += len(member.local)
+    directory = b"".join(centrals)
+    end = _END.pack(
+        _END_SIG, 0, 0, len(centrals), len(centrals), len(directory), offset, len(package.comment),
+    )
+    output_path.write_bytes(b"".join(locals_) + directory + end + package.comment)
+
+
+def render_docx_xml(
+    template_path: Path,
+    output_path: Path,
+    mapping: Dict[str, str],
+    rows: Optional[Dict[str, list]] = None,
+) -> None:
+    compiled = get_compiled_template(template_path)
+    document_name = compiled.document.part.partname.lstrip("/")
+    package = _get_package(template_path, compiled.mtime_ns, document_name)
+
+    root = parse_xml(package.document_xml)
+    fill_body(root.find(qn("w:body")), compiled, mapping, rows)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_package(output_path, package, serialize_part_xml(root))
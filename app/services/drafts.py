@@ -0,0 +1,558 @@
+"""
+Armazenamento dos rascunhos.
+
+`FileDraftStore` (padrão) grava um JSON por rascunho em data_dir, em
+subdiretórios pelo início do id, com um índice de expiração por dia ao lado.
+`SQLiteDraftStore` guarda tudo num banco SQLite em modo WAL, com atualização
+atômica por rascunho e expiração por índice. A escolha é feita por
+`settings.draft_backend` ("file" ou "sqlite"). A expiração roda em segundo
+plano (app/services/janitor.py) e as leituras passam por `CachedDraftStore`.
+"""
+from __future__ import annotations
+
+import calendar
+import fcntl
+import json
+import os
+import queue
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from app.services.metrics import DRAFT_OPERATIONS, Labels, gauge
+from app.settings import settings
+
+DraftUpdate = Callable[[dict], dict]
+# muda a cada gravação do rascunho; o último item é o tamanho gravado
+Version = Tuple[Any, ...]
+
+_DRAFT_ID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+class DraftNotFoundError(LookupError):
+    pass
+
+
+class DraftConflictError(Exception):
+    """A versão esperada (If-Match) não é a atual do rascunho."""
+
+    def __init__(self, current: int):
+        super().__init__(current)
+        self.current = current
+
+
+def merge_patch(target: Any, patch: Any) -> Any:
+    """
+    JSON Merge Patch (RFC 7396): objetos são mesclados recursivamente, `null`
+    remove a chave e qualquer outro valor (inclusive listas) substitui o
+    anterior. Não altera `target`.
+    """
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+class DraftStore:
+    # load/save/update são as operações da API; o tempo delas vai para /metrics
+    def load(self, draft_id: str) -> dict:
+        with DRAFT_OPERATIONS.time("load"):
+            return self.load_versioned(draft_id)[0]
+
+    def save(self, draft_id: str, payload: dict) -> None:
+        with DRAFT_OPERATIONS.time("save"):
+            self.save_versioned(draft_id, payload)
+
+    def update(self, draft_id: str, fn: DraftUpdate) -> dict:
+        """Lê, aplica `fn` e grava sem que outra atualização se intercale."""
+        with DRAFT_OPERATIONS.time("update"):
+            return self.update_versioned(draft_id, fn)[0]
+
+    def version(self, draft_id: str) -> Optional[Version]:
+        """Versão atual sem ler o conteúdo (None se o rascunho não existe)."""
+        raise NotImplementedError
+
+    def load_versioned(self, draft_id: str) -> Tuple[dict, Version]:
+        raise NotImplementedError
+
+    def save_versioned(self, draft_id: str, payload: dict) -> Version:
+        raise NotImplementedError
+
+    def update_versioned(self, draft_id: str, fn: DraftUpdate) -> Tuple[dict, Version]:
+        raise NotImplementedError
+
+    def purge(self, cutoff: float, limit: Optional[int] = None) -> int:
+        """
+        Remove rascunhos sem alteração desde `cutoff` (timestamp), olhando no
+        máximo `limit` entradas do índice. Retorna quantas entradas foram
+        processadas; 0 quando não há mais nada vencido.
+        """
+        raise NotImplementedError
+
+
+class ExpiryIndex:
+    """
+    Índice de expiração dos rascunhos em arquivo: `root/AAAAMMDD/<id>`, um
+    marcador vazio para cada dia (UTC) em que o rascunho foi gravado. A
+    limpeza só abre os dias já vencidos, sem listar os rascunhos.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        # marcadores já criados hoje por este processo (autosave não repete o syscall)
+        self._today = ""
+        self._marked: set = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _day(ts: float) -> str:
+        return time.strftime("%Y%m%d", time.gmtime(ts))
+
+    def _mark(self, draft_id: str, day: str) -> None:
+        bucket = self.root / day
+        bucket.mkdir(parents=True, exist_ok=True)
+        (bucket / draft_id).touch()
+
+    def touch(self, draft_id: str) -> None:
+        day = self._day(time.time())
+        with self._lock:
+            if day == self._today and draft_id in self._marked:
+                return
+        self._mark(draft_id, day)
+        with self._lock:
+            if day != self._today:
+                self._today, self._marked = day, set()
+            self._marked.add(draft_id)
+
+    def add(self, draft_id: str, mtime: float) -> None:
+        self._mark(draft_id, self._day(mtime))
+
+    def expired(self, cutoff: float, limit: Optional[int] = None) -> Iterator[Path]:
+        """Marcadores dos dias que terminaram antes de `cutoff`; dias esgotados são removidos."""
+        if not self.root.exists():
+            return
+        count = 0
+        for bucket in sorted(self.root.iterdir()):
+            if not bucket.is_dir() or not bucket.name.isdigit():
+                continue
+            day_end = calendar.timegm(time.strptime(bucket.name, "%Y%m%d")) + 86400
+            if day_end > cutoff:
+                break
+            for marker in bucket.iterdir():
+                if limit is not None and count >= limit:
+                    return
+                count += 1
+                yield marker
+            try:
+                bucket.rmdir()
+            except OSError:
+                pass
+
+
+class FileDraftStore(DraftStore):
+    """
+    Um JSON compacto por rascunho em `root/ab/cd/<id>.json` (dois níveis pelo
+    início do id). A gravação vai para um temporário no mesmo diretório e
+    entra no lugar com `os.replace`, então quem lê nunca vê um JSON pela
+    metade. Rascunhos do layout antigo (`root/<id>.json`) são movidos para o
+    shard no primeiro acesso ou pelo `migrate_flat_drafts`.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.index = ExpiryIndex(root / "expiry")
+
+    def _path(self, draft_id: str) -> Path:
+        if not _DRAFT_ID_RE.match(draft_id):
+            # o id vira caminho: nada de "..", "/" etc.
+            raise DraftNotFoundError(draft_id)
+        return self.root / draft_id[:2] / draft_id[2:4] / f"{draft_id}.json"
+
+    def _adopt_flat(self, draft_id: str) -> bool:
+        """
+        Move `root/<id>.json` (layout antigo) para o shard e o registra no
+        índice pelo mtime original; False se não existir.
+        """
+        path = self._path(draft_id)
+        flat = self.root / f"{draft_id}.json"
+        if not flat.exists():
+            return path.exists()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(flat, path)
+        except FileNotFoundError:
+            # outro worker pode ter movido primeiro
+            return path.exists()
+        try:
+            self.index.add(draft_id, path.stat().st_mtime)
+        except OSError:
+            pass
+        return True
+
+    @staticmethod
+    def _version(st: os.stat_result) -> Version:
+        # cada gravação é um arquivo novo (os.replace), então o inode já distingue
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    @classmethod
+    def _write(cls, path: Path, payload: dict) -> Version:
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".part")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(payload, fh, ensure_ascii=False, separators=(",", ":"))
+                fh.flush()
+                version = cls._version(os.fstat(fh.fileno()))
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return version
+
+    def _read(self, path: Path) -> Tuple[dict, Version]:
+        with path.open("r", encoding="utf-8") as fh:
+            version = self._version(os.fstat(fh.fileno()))
+            return json.loads(fh.read()), version
+
+    def version(self, draft_id: str) -> Optional[Version]:
+        try:
+            return self._version(self._path(draft_id).stat())
+        except (FileNotFoundError, DraftNotFoundError):
+            return None
+
+    def load_versioned(self, draft_id: str) -> Tuple[dict, Version]:
+        path = self._path(draft_id)
+        try:
+            return self._read(path)
+        except FileNotFoundError:
+            if not self._adopt_flat(draft_id):
+                raise DraftNotFoundError(draft_id)
+        return self._read(path)
+
+    def save_versioned(self, draft_id: str, payload: dict) -> Version:
+        path = self._path(draft_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        version = self._write(path, payload)
+        self.index.touch(draft_id)
+        return version
+
+    def update_versioned(self, draft_id: str, fn: DraftUpdate) -> Tuple[dict, Version]:
+        path = self._path(draft_id)
+        while True:
+            try:
+                fh = path.open("r", encoding="utf-8")
+            except FileNotFoundError:
+                if not self._adopt_flat(draft_id):
+                    raise DraftNotFoundError(draft_id)
+                continue
+            with fh:
+                # flock serializa PATCHes concorrentes (threads e workers do uvicorn)
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                try:
+                    replaced = os.fstat(fh.fileno()).st_ino != path.stat().st_ino
+                except FileNotFoundError:
+                    raise DraftNotFoundError(draft_id)
+                if replaced:
+                    # outro PATCH trocou o arquivo enquanto esperávamos o lock: relê
+                    continue
+                draft = fn(json.loads(fh.read()))
+                version = self._write(path, draft)
+            self.index.touch(draft_id)
+            return draft, version
+
+    def purge(self, cutoff: float, limit: Optional[int] = None) -> int:
+        processed = 0
+        for marker in self.index.expired(cutoff, limit):
+            processed += 1
+            try:
+                path = self._path(marker.name)
+            except DraftNotFoundError:
+                marker.unlink(missing_ok=True)
+                continue
+            for candidate in (path, self.root / f"{marker.name}.json"):
+                try:
+                    # gravado de novo depois: há outro marcador num dia mais recente
+                    if candidate.stat().st_mtime < cutoff:
+                        candidate.unlink(missing_ok=True)
+                except OSError:
+                    pass
+            marker.unlink(missing_ok=True)
+        return processed
+
+    def backfill_index(self) -> None:
+        """Indexa (uma vez) os rascunhos gravados antes de existir o índice, nos dois layouts."""
+        done = self.index.root / ".indexed"
+        if done.exists():
+            return
+        for pattern in ("*.json", "??/??/*.json"):
+            for fp in self.root.glob(pattern):
+                if not _DRAFT_ID_RE.match(fp.stem):
+                    continue
+                try:
+                    self.index.add(fp.stem, fp.stat().st_mtime)
+                except OSError:
+                    continue
+        self.index.root.mkdir(parents=True, exist_ok=True)
+        done.touch()
+
+
+def migrate_flat_drafts(root: Path) -> int:
+    """Move os rascunhos de `root/<id>.json` para `root/ab/cd/<id>.json`; retorna quantos."""
+    store = FileDraftStore(root)
+    moved = 0
+    for fp in root.glob("*.json"):
+        if _DRAFT_ID_RE.match(fp.stem) and store._adopt_flat(fp.stem):
+            moved += 1
+    return moved
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS drafts_created_at ON drafts (created_at);
+CREATE INDEX IF NOT EXISTS drafts_updated_at ON drafts (updated_at);
+"""
+
+
+class SQLiteDraftStore(DraftStore):
+    """
+    Rascunhos num SQLite em modo WAL (leituras não bloqueiam a escrita).
+    As conexões ficam num pool; `update` roda em BEGIN IMMEDIATE, então dois
+    PATCHes no mesmo rascunho são aplicados um depois do outro.
+    """
+
+    def __init__(self, path: Path, pool_size: int = 4, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        for _ in range(max(1, pool_size)):
+            self._pool.put(self._connect())
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: transações explícitas (BEGIN IMMEDIATE em update)
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    @contextmanager
+    def _conn(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._pool.put(conn)
+
+    # versão: (updated_at, tamanho do payload em caracteres)
+
+    def version(self, draft_id: str) -> Optional[Version]:
+        with self._conn() as conn:
+            row = conn.execute("SELECT updated_at, length(payload) FROM drafts WHERE id = ?", (draft_id,)).fetchone()
+        return tuple(row) if row is not None else None
+
+    def load_versioned(self, draft_id: str) -> Tuple[dict, Version]:
+        with self._conn() as conn:
+            row = conn.execute("SELECT payload, updated_at FROM drafts WHERE id = ?", (draft_id,)).fetchone()
+        if row is None:
+            raise DraftNotFoundError(draft_id)
+        return json.loads(row[0]), (row[1], len(row[0]))
+
+    def save_versioned(self, draft_id: str, payload: dict) -> Version:
+        now = time.time()
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO drafts (id, payload, created_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET payload = excluded.payload, updated_at = excluded.updated_at",
+                (draft_id, body, now, now),
+            )
+        return (now, len(body))
+
+    def update_versioned(self, draft_id: str, fn: DraftUpdate) -> Tuple[dict, Version]:
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT payload FROM drafts WHERE id = ?", (draft_id,)).fetchone()
+            if row is None:
+                raise DraftNotFoundError(draft_id)
+            draft = fn(json.loads(row[0]))
+            now = time.time()
+            body = json.dumps(draft, ensure_ascii=False, separators=(",", ":"))
+            conn.execute("UPDATE drafts SET payload = ?, updated_at = ? WHERE id = ?", (body, now, draft_id))
+            conn.execute("COMMIT")
+        return draft, (now, len(body))
+
+    def purge(self, cutoff: float, limit: Optional[int] = None) -> int:
+        with self._conn() as conn:
+            return conn.execute(
+                "DELETE FROM drafts WHERE id IN (SELECT id FROM drafts WHERE updated_at < ? LIMIT ?)",
+                (cutoff, -1 if limit is None else limit),
+            ).rowcount
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class CachedDraftStore(DraftStore):
+    """
+    LRU dos rascunhos já interpretados, limitado em bytes, na frente de outro
+    store. Cada leitura confere a versão no store (um stat ou um SELECT pelo
+    id) antes de usar a cópia, então outro worker do uvicorn que gravou o
+    rascunho nunca é ignorado. Gravações atualizam o cache (write-through).
+    Os dicts devolvidos são compartilhados com o cache: não altere.
+    """
+
+    def __init__(self, inner: DraftStore, max_bytes: int):
+        self.inner = inner
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Version, dict]]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def _put(self, draft_id: str, draft: dict, version: Version) -> None:
+        size = version[-1]
+        with self._lock:
+            old = self._entries.pop(draft_id, None)
+            if old is not None:
+                self._total -= old[0][-1]
+            if size > self.max_bytes:
+                return
+            self._entries[draft_id] = (version, draft)
+            self._total += size
+            while self._total > self.max_bytes:
+                _, (v, _) = self._entries.popitem(last=False)
+                self._total -= v[-1]
+
+    def _drop(self, draft_id: str) -> None:
+        with self._lock:
+            old = self._entries.pop(draft_id, None)
+            if old is not None:
+                self._total -= old[0][-1]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "entries": len(self._entries),
+                "bytes": self._total,
+            }
+
+    def version(self, draft_id: str) -> Optional[Version]:
+        return self.inner.version(draft_id)
+
+    def load_versioned(self, draft_id: str) -> Tuple[dict, Version]:
+        with self._lock:
+            entry = self._entries.get(draft_id)
+        if entry is not None:
+            if self.inner.version(draft_id) == entry[0]:
+                with self._lock:
+                    self.hits += 1
+                    if draft_id in self._entries:
+                        self._entries.move_to_end(draft_id)
+                return entry[1], entry[0]
+            with self._lock:
+                self.stale += 1
+        with self._lock:
+            self.misses += 1
+        try:
+            draft, version = self.inner.load_versioned(draft_id)
+        except DraftNotFoundError:
+            self._drop(draft_id)
+            raise
+        self._put(draft_id, draft, version)
+        return draft, version
+
+    def save_versioned(self, draft_id: str, payload: dict) -> Version:
+        version = self.inner.save_versioned(draft_id, payload)
+        self._put(draft_id, payload, version)
+        return version
+
+    def update_versioned(self, draft_id: str, fn: DraftUpdate) -> Tuple[dict, Version]:
+        try:
+            draft, version = self.inner.update_versioned(draft_id, fn)
+        except DraftNotFoundError:
+            self._drop(draft_id)
+            raise
+        self._put(draft_id, draft, version)
+        return draft, version
+
+    def purge(self, cutoff: float, limit: Optional[int] = None) -> int:
+        # entradas de rascunhos removidos caem na conferência de versão
+        return self.inner.purge(cutoff, limit)
+
+
+_store: Optional[DraftStore] = None
+_store_lock = threading.Lock()
+
+
+def get_draft_store() -> DraftStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            if settings.draft_backend == "file":
+                _store = FileDraftStore(settings.data_dir)
+            elif settings.draft_backend == "sqlite":
+                path = settings.draft_sqlite_path or settings.data_dir / "db" / "drafts.sqlite3"
+                _store = SQLiteDraftStore(path, pool_size=settings.draft_sqlite_pool_size)
+            else:
+                raise ValueError(f"draft_backend desconhecido: {settings.draft_backend!r}")
+            if settings.draft_cache_max_bytes > 0:
+                _store = CachedDraftStore(_store, settings.draft_cache_max_bytes)
+        return _store
+
+
+def _cache_gauge() -> Dict[Labels, float]:
+    store = _store
+    if not isinstance(store, CachedDraftStore):
+        return {}
+    return {(name,): value for name, value in store.stats().items()}
+
+
+gauge("ufpb_draft_cache", "Cache de rascunhos deste worker: hits, misses, stale, entries e bytes.", ("stat",), fn=_cache_gauge)
+
+
+def close_draft_store() -> None:
+    global _store
+    with _store_lock:
+        inner = getattr(_store, "inner", _store)
+        if isinstance(inner, SQLiteDraftStore):
+            inner.close()
+        _store = None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rascunhos em arquivo.")
+    parser.add_argument("command", choices=["migrate"], help="migrate: layout plano -> data_dir/ab/cd/<id>.json")
+    parser.add_argument("--data-dir", type=Path, default=settings.data_dir)
+    args = parser.parse_args()
+    print(f"{migrate_flat_drafts(args.data_dir)} rascunho(s) movido(s) em {args.data_dir}")
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import resource
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Deque, Optional, Tuple
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_render_executor: Optional[ProcessPoolExecutor] = None
+_parse_pool: Optional["ParsePool"] = None
+_lock = threading.Lock()
+
+
+class ParseLimitExceeded(RuntimeError):
+    """O processo de leitura morreu (limite de CPU/memória) com o arquivo."""
+
+
+def get_render_executor() -> ProcessPoolExecutor:
+    """Pool de processos dedicado à renderização DOCX (CPU), fora do event loop."""
+    global _render_executor
+    with _lock:
+        if _render_executor is None:
+            _render_executor = ProcessPoolExecutor(
+                max_workers=max(1, settings.render_workers),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _render_executor
+
+
+def _run_limited(cpu_limit_s: int, fn: Callable[..., Any], *args: Any) -> Any:
+    # RLIMIT_CPU conta o processo inteiro: o limite é o gasto até aqui + o desta tarefa
+    if cpu_limit_s > 0:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        used = int(usage.ru_utime + usage.ru_stime) + 1
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        resource.setrlimit(resource.RLIMIT_CPU, (used + cpu_limit_s, hard))
+    return fn(*args)
+
+
+def _parse_worker_main(conn: Connection, memory_limit_bytes: int) -> None:
+    """Laço do processo de leitura: recebe (fn, args, limite de CPU) e devolve (ok, valor)."""
+    if memory_limit_bytes > 0:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+    importlib.import_module("app.services.anexo1_import")
+    while True:
+        try:
+            fn, args, cpu_limit_s = conn.recv()
+        except EOFError:
+            return
+        try:
+            result: Tuple[bool, Any] = (True, _run_limited(cpu_limit_s, fn, *args))
+        except BaseException as exc:  # noqa: BLE001 - devolvida ao chamador
+            result = (False, exc)
+        try:
+            conn.send(result)
+        except Exception:
+            # resultado ou exceção que não serializa
+            conn.send((False, RuntimeError(f"Falha na leitura: {result[1]!r}")))
+        if not result[0] and isinstance(result[1], MemoryError):
+            return
+
+
+class _ParseWorker:
+    """Um processo de leitura (spawn) ligado por um pipe; atende uma tarefa por vez."""
+
+    def __init__(self, memory_limit_bytes: int):
+        self.memory_limit_bytes = memory_limit_bytes
+        self.proc: Optional[multiprocessing.process.BaseProcess] = None
+        self.conn: Optional[Connection] = None
+        self.tasks = 0
+
+    def start(self) -> None:
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(target=_parse_worker_main, args=(child, self.memory_limit_bytes), daemon=True)
+        self.proc.start()
+        child.close()
+        self.tasks = 0
+
+    def kill(self) -> None:
+        proc = self.proc
+        if proc is not None and proc.is_alive():
+            proc.kill()
+
+    def stop(self) -> None:
+        proc, conn = self.proc, self.conn
+        self.proc = self.conn = None
+        if proc is not None:
+            if proc.is_alive():
+                proc.kill()
+            proc.join(timeout=5)
+        if conn is not None:
+            conn.close()
+
+    def restart(self) -> None:
+        self.stop()
+        self.start()
+
+    def is_healthy(self) -> bool:
+        return self.proc is not None and self.proc.is_alive()
+
+    def call(self, fn: Callable[..., Any], args: Tuple[Any, ...], cpu_limit_s: int) -> Any:
+        self.conn.send((fn, args, cpu_limit_s))
+        try:
+            ok, value = self.conn.recv()
+        except (EOFError, OSError):
+            raise ParseLimitExceeded("O processo de leitura foi encerrado durante a tarefa.")
+        self.tasks += 1
+        if ok:
+            return value
+        if isinstance(value, MemoryError):
+            raise ParseLimitExceeded("Limite de memória da leitura excedido.")
+        raise value
+
+
+class ParsePool:
+    """
+    Processos para ler os arquivos enviados (pdfplumber, DOCX). Cada processo
+    tem limite de memória (RLIMIT_AS) e cada tarefa, de CPU (RLIMIT_CPU). Um
+    processo que morre pelos limites ou é morto por timeout leva junto só a
+    própria tarefa; ele é recriado na devolução, assim como os que chegaram a
+    `max_tasks` tarefas.
+
+    A espera por um processo livre é um future no event loop, sem prender
+    thread. A conversa com o processo e a recriação rodam num executor
+    próprio com uma thread por processo: quem tem thread ocupada sempre tem
+    um processo em mãos, então nenhuma devolução fica presa atrás de esperas.
+    """
+
+    def __init__(self, size: int, memory_limit_bytes: int, max_tasks: int):
+        self.max_tasks = max_tasks
+        self._workers = [_ParseWorker(memory_limit_bytes) for _ in range(size)]
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="parse")
+        # _idle e _waiters mudam no loop e nas threads do executor (devolução)
+        self._mutex = threading.Lock()
+        self._idle: Deque[_ParseWorker] = deque(self._workers)
+        self._waiters: "Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future[_ParseWorker]]]" = deque()
+
+    def warm_up(self) -> None:
+        for worker in self._workers:
+            if not worker.is_healthy():
+                worker.start()
+
+    async def acquire(self) -> _ParseWorker:
+        loop = asyncio.get_running_loop()
+        with self._mutex:
+            if self._idle and not self._waiters:
+                worker: Optional[_ParseWorker] = self._idle.popleft()
+            else:
+                worker = None
+                waiter: "asyncio.Future[_ParseWorker]" = loop.create_future()
+                self._waiters.append((loop, waiter))
+        if worker is None:
+            try:
+                worker = await waiter
+            except asyncio.CancelledError:
+                # o processo pode ter chegado junto com o cancelamento
+                if waiter.done() and not waiter.cancelled():
+                    self._put_back(waiter.result())
+                raise
+        if not worker.is_healthy():
+            restart = loop.run_in_executor(self._executor, worker.restart)
+            try:
+                await asyncio.shield(restart)
+            except asyncio.CancelledError:
+                restart.add_done_callback(lambda _: self._put_back(worker))
+                raise
+            except Exception:
+                self._put_back(worker)
+                raise
+        return worker
+
+    def call(self, worker: _ParseWorker, fn: Callable[..., Any], args: Tuple[Any, ...], cpu_limit_s: int) -> "asyncio.Future[Any]":
+        return asyncio.get_running_loop().run_in_executor(self._executor, worker.call, fn, args, cpu_limit_s)
+
+    def release(self, worker: _ParseWorker, *, failed: bool = False) -> None:
+        """Devolve o processo sem bloquear; a recriação, se houver, roda no executor."""
+        if failed or (self.max_tasks and worker.tasks >= self.max_tasks):
+            self._executor.submit(self._restart_and_put_back, worker)
+        else:
+            self._put_back(worker)
+
+    def _restart_and_put_back(self, worker: _ParseWorker) -> None:
+        try:
+            worker.restart()
+        except Exception:
+            # fica parado; o próximo acquire tenta de novo
+            logger.exception("Falha ao recriar o processo de leitura")
+        finally:
+            self._put_back(worker)
+
+    def _put_back(self, worker: _ParseWorker) -> None:
+        # chamado no loop ou numa thread do executor
+        with self._mutex:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                if not waiter.done():
+                    loop.call_soon_threadsafe(self._hand_over, waiter, worker)
+                    return
+            self._idle.append(worker)
+
+    def _hand_over(self, waiter: "asyncio.Future[_ParseWorker]", worker: _ParseWorker) -> None:
+        if waiter.done():
+            # cancelado depois de sair da fila
+            self._put_back(worker)
+        else:
+            waiter.set_result(worker)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for worker in self._workers:
+            worker.stop()
+
+
+def get_parse_pool() -> ParsePool:
+    global _parse_pool
+    with _lock:
+        if _parse_pool is None:
+            _parse_pool = ParsePool(
+                max(1, settings.parse_workers),
+                settings.parse_memory_limit_mb * 1024 * 1024,
+                settings.parse_max_tasks_per_child,
+            )
+        return _parse_pool
+
+
+def warm_up_parse_pool() -> None:
+    """Sobe os processos de leitura (que importam o parser) sem esperar por eles."""
+    get_parse_pool().warm_up()
+
+
+async def run_in_parse_pool(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Executa `fn(*args)` num processo de leitura. Se a espera for cancelada
+    (timeout do chamador), só o processo desta tarefa é morto. Um processo
+    derrubado pelos limites vira ParseLimitExceeded, sem nova tentativa.
+    """
+    pool = get_parse_pool()
+    worker = await pool.acquire()
+    call = pool.call(worker, fn, args, settings.parse_cpu_limit_s)
+
+    def _release(f: "asyncio.Future[Any]") -> None:
+        # só depois que a chamada terminou o processo volta ao pool (e pode ser recriado)
+        failed = f.cancelled() or isinstance(f.exception(), ParseLimitExceeded)
+        pool.release(worker, failed=failed)
+
+    call.add_done_callback(_release)
+    try:
+        return await asyncio.shield(call)
+    except asyncio.CancelledError:
+        if not call.done():
+            # a chamada recebe EOF e o processo é recriado na devolução
+            worker.kill()
+        raise
+    except ParseLimitExceeded:
+        logger.warning("Processo de leitura encerrado (limite de CPU/memória); arquivo recusado.")
+        raise
+
+
+def shutdown_executors() -> None:
+    global _render_executor, _parse_pool
+    with _lock:
+        render, parse = _render_executor, _parse_pool
+        _render_executor = _parse_pool = None
+    if render is not None:
+        render.shutdown(wait=False, cancel_futures=True)
+    if parse is not None:
+        parse.shutdown()
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from app.services.drafts import FileDraftStore, get_draft_store
+from app.services.jobs import JobQueue
+from app.services.metrics import load_data_dir_size, update_data_dir_size
+
+logger = logging.getLogger(__name__)
+
+
+class Janitor:
+    """
+    Expira rascunhos em segundo plano, fora dos pedidos.
+
+    A cada `interval_s` remove os rascunhos sem alteração há mais de
+    `retention_s`, em lotes de `batch_size` com pausa entre eles. Com vários
+    workers do uvicorn só um faz a passada (flock em `lock_path`). Com
+    `jobs`, a mesma passada remove os jobs concluídos há mais de
+    `jobs_retention_s`. Com `data_dir`, quem faz a passada mede também o
+    tamanho do diretório para /metrics e grava o resultado em
+    `data_dir/.data-dir-size.json`, de onde os demais workers o leem.
+    """
+
+    def __init__(
+        self,
+        lock_path: Path,
+        interval_s: float,
+        retention_s: float,
+        batch_size: int,
+        pause_s: float,
+        data_dir: Optional[Path] = None,
+        jobs: Optional[JobQueue] = None,
+        jobs_retention_s: float = 0.0,
+    ):
+        self.lock_path = lock_path
+        self.interval_s = interval_s
+        self.retention_s = retention_s
+        self.batch_size = max(1, batch_size)
+        self.pause_s = pause_s
+        self.data_dir = data_dir
+        self.jobs = jobs
+        self.jobs_retention_s = jobs_retention_s
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        store = get_draft_store()
+        store = getattr(store, "inner", store)  # CachedDraftStore
+        if isinstance(store, FileDraftStore):
+            await asyncio.to_thread(store.backfill_index)
+        while True:
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Falha na limpeza dos rascunhos expirados")
+            if self.data_dir is not None:
+                await asyncio.to_thread(load_data_dir_size, self._size_snapshot)
+            await asyncio.sleep(self.interval_s)
+
+    @property
+    def _size_snapshot(self) -> Path:
+        return self.data_dir / ".data-dir-size.json"
+
+    def _try_lock(self) -> Optional[int]:
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+    async def sweep(self) -> int:
+        """Uma passada completa; retorna quantas entradas do índice foram processadas."""
+        fd = await asyncio.to_thread(self._try_lock)
+        if fd is None:
+            return 0
+        store = get_draft_store()
+        cutoff = time.time() - self.retention_s
+        total = 0
+        try:
+            while True:
+                processed = await asyncio.to_thread(store.purge, cutoff, self.batch_size)
+                total += processed
+                if processed < self.batch_size:
+                    break
+                await asyncio.sleep(self.pause_s)
+            if total:
+                logger.info("Limpeza de rascunhos: %d entradas expiradas processadas", total)
+            if self.jobs is not None:
+                await self._purge_jobs()
+            if self.data_dir is not None:
+                # varredura O(arquivos): só no worker com o flock, uma vez por passada
+                try:
+                    await asyncio.to_thread(update_data_dir_size, self.data_dir, self._size_snapshot)
+                except Exception:
+                    logger.exception("Falha ao medir %s", self.data_dir)
+        finally:
+            os.close(fd)
+        return total
+
+    async def _purge_jobs(self) -> None:
+        try:
+            removed = await asyncio.to_thread(self.jobs.purge, self.jobs_retention_s)
+        except Exception:
+            logger.exception("Falha na limpeza dos jobs concluídos")
+            return
+        if removed:
+            logger.info("Limpeza de jobs: %d jobs concluídos removidos", removed)
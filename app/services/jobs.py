@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# handler(kind, format, payload, destino) grava o resultado em `destino`
+JobHandler = Callable[[str, str, Dict[str, Any], Path], Awaitable[None]]
+
+
+class QueueFullError(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    format: str
+    status: str = "queued"  # queued | running | done | failed
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    error: Optional[str] = None
+    filename: Optional[str] = None
+
+    def public(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "format": self.format,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """
+    Fila de geração em segundo plano, com workers limitados e fila de
+    tamanho máximo. Estado, entrada e resultado de cada job ficam em
+    `root/<id>/`, então o status é visível por qualquer worker do uvicorn e
+    jobs interrompidos por um restart são retomados na próxima subida.
+    """
+
+    def __init__(self, root: Path, workers: int, max_queue: int, handler: JobHandler):
+        self.root = root
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.handler = handler
+        self._queue: "asyncio.Queue[Job]" = asyncio.Queue()
+        self._tasks: List["asyncio.Task[None]"] = []
+        # lock (flock) de cada job enquanto estiver nesta instância
+        self._locks: Dict[str, int] = {}
+
+    def _dir(self, job_id: str) -> Path:
+        return self.root / job_id
+
+    def _write(self, job: Job, payload: Optional[Dict[str, Any]] = None) -> None:
+        job.updated_at = time.time()
+        data = {**job.__dict__}
+        if payload is not None:
+            data["payload"] = payload
+        else:
+            old = self._read_raw(job.id)
+            if old and "payload" in old:
+                data["payload"] = old["payload"]
+        fp = self._dir(job.id) / "job.json"
+        tmp = fp.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, fp)
+
+    def _read_raw(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads((self._dir(job_id) / "job.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _try_lock(self, job_id: str) -> bool:
+        fd = os.open(self._dir(job_id) / ".lock", os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._locks[job_id] = fd
+        return True
+
+    def _unlock(self, job_id: str) -> None:
+        fd = self._locks.pop(job_id, None)
+        if fd is not None:
+            os.close(fd)
+
+    async def start(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(self._resume_pending)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job_id in list(self._locks):
+            self._unlock(job_id)
+
+    def _resume_pending(self) -> None:
+        # jobs sem dono (worker reiniciado no meio) voltam para a fila
+        for job_dir in self.root.iterdir():
+            raw = self._read_raw(job_dir.name) if job_dir.is_dir() else None
+            if not raw or raw.get("status") not in ("queued", "running"):
+                continue
+            if not self._try_lock(job_dir.name):
+                continue
+            raw.pop("payload", None)
+            job = Job(**raw)
+            job.status = "queued"
+            self._write(job)
+            self._queue.put_nowait(job)
+
+    def submit(self, kind: str, format: str, payload: Dict[str, Any]) -> Job:
+        if self._queue.qsize() >= self.max_queue:
+            raise QueueFullError()
+        job = Job(id=uuid.uuid4().hex, kind=kind, format=format)
+        self._dir(job.id).mkdir(parents=True, exist_ok=True)
+        self._try_lock(job.id)
+        self._write(job, payload)
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        raw = self._read_raw(job_id)
+        if raw is None:
+            return None
+        raw.pop("payload", None)
+        return Job(**raw)
+
+    def result_path(self, job: Job) -> Optional[Path]:
+        if job.status != "done" or not job.filename:
+            return None
+        return self._dir(job.id) / job.filename
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception:
+                # falha ao gravar o estado (disco cheio, permissão...): o job vira
+                # "failed" se ainda der, e o worker continua atendendo a fila
+                logger.exception("Falha ao registrar o job %s", job.id)
+                self._mark_failed(job)
+            finally:
+                self._queue.task_done()
+
+    def _mark_failed(self, job: Job) -> None:
+        try:
+            job.status = "failed"
+            job.error = job.error or "Falha ao gerar o documento."
+            self._write(job)
+        except Exception:
+            logger.exception("Não foi possível marcar o job %s como falho", job.id)
+        finally:
+            self._unlock(job.id)
+
+    async def _run(self, job: Job) -> None:
+        raw = self._read_raw(job.id) or {}
+        job.status = "running"
+        self._write(job)
+        filename = f"{job.kind}_preenchido.{job.format}"
+        try:
+            await self.handler(job.kind, job.format, raw.get("payload") or {}, self._dir(job.id) / filename)
+        except asyncio.CancelledError:
+            # desligamento: o job continua "running" no disco e é retomado depois
+            raise
+        except Exception as exc:
+            logger.exception("Falha no job %s", job.id)
+            job.status = "failed"
+            job.error = getattr(exc, "detail", None) or "Falha ao gerar o documento."
+        else:
+            job.status = "done"
+            job.filename = filename
+        self._write(job)
+        self._unlock(job.id)
+
+    def purge(self, max_age_s: float) -> int:
+        """Remove jobs concluídos há mais de `max_age_s`; chamado pelo janitor. Retorna quantos."""
+        if not self.root.is_dir():
+            return 0
+        cutoff = time.time() - max_age_s
+        removed = 0
+        for job_dir in self.root.iterdir():
+            raw = self._read_raw(job_dir.name) if job_dir.is_dir() else None
+            if raw and raw.get("status") in ("done", "failed") and raw.get("updated_at", 0) < cutoff:
+                shutil.rmtree(job_dir, ignore_errors=True)
+                removed += 1
+        return removed
@@ -0,0 +1,308 @@
+"""
+Métricas no formato texto do Prometheus, servidas em /metrics.
+
+Sem dependências: contadores, gauges e histogramas simples, guardados em
+memória por processo. Com vários workers do uvicorn cada um expõe os
+próprios números (o scrape cai num deles); some pelo rótulo `instance` ou
+rode um worker só por contêiner. Registrar custa um lock e, nos
+histogramas, uma busca binária nos buckets.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+
+# segundos: de validações (ms) a conversões de lote (minutos)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# bytes: 16 KB a 32 MB (limite padrão do upload é 20 MB)
+SIZE_BUCKETS = tuple(16 * 1024 * 4 ** i for i in range(6)) + (32 * 1024 * 1024,)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}", *self._samples()]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Valor atual; com `fn`, lido na hora do scrape (dict rótulos -> valor)."""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        fn: Optional[Callable[[], Dict[Labels, float]]] = None,
+    ):
+        super().__init__(name, help, labels)
+        self._values: Dict[Labels, float] = {}
+        self.fn = fn
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def _samples(self) -> List[str]:
+        if self.fn is not None:
+            values = self.fn()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # por rótulo: contagem por bucket (não acumulada; o último é o +Inf) e soma
+        self._counts: Dict[Labels, List[int]] = {}
+        self._sums: Dict[Labels, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[i] += 1
+            self._sums[labels] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(c), self._sums[k]) for k, c in self._counts.items())
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrica já registrada: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labels))
+
+
+def gauge(name: str, help: str, labels: Sequence[str] = (), fn: Optional[Callable[[], Dict[Labels, float]]] = None) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, labels, fn))
+
+
+def histogram(name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DURATION_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labels, buckets))
+
+
+HTTP_REQUESTS = counter("ufpb_http_requests_total", "Pedidos HTTP por rota, método e status.", ("route", "method", "status"))
+HTTP_DURATION = histogram("ufpb_http_request_duration_seconds", "Duração dos pedidos HTTP por rota.", ("route", "method"))
+STAGE_DURATION = histogram(
+    "ufpb_stage_duration_seconds",
+    "Duração das etapas da geração e do prefill (validate, render, convert, extract; render_batch e convert_batch no lote).",
+    ("stage",),
+)
+STAGE_FAILURES = counter("ufpb_stage_failures_total", "Etapas encerradas com exceção (inclui timeout e cancelamento).", ("stage",))
+UPLOAD_BYTES = histogram("ufpb_upload_bytes", "Tamanho dos arquivos do Anexo I recebidos no prefill.", (), SIZE_BUCKETS)
+LIBREOFFICE_STARTS = counter("ufpb_libreoffice_starts_total", "Instâncias residentes do LibreOffice iniciadas (inclui reciclagens).")
+LIBREOFFICE_CONVERSIONS = counter(
+    "ufpb_libreoffice_conversions_total",
+    "Chamadas de conversão do soffice por resultado (ok, failed, timeout, cancelled).",
+    ("result",),
+)
+DRAFT_OPERATIONS = histogram("ufpb_draft_operation_duration_seconds", "Duração das operações no store de rascunhos.", ("operation",))
+DATA_DIR_BYTES = gauge("ufpb_data_dir_bytes", "Tamanho de data_dir, medido a cada passada do janitor.")
+DATA_DIR_FILES = gauge("ufpb_data_dir_files", "Arquivos em data_dir, medidos a cada passada do janitor.")
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Cronometra uma etapa; exceções (timeout, cancelamento) contam como falha."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_FAILURES.inc(name)
+        raise
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, name)
+
+
+def measure_dir(root: Path) -> Tuple[int, int]:
+    """(bytes, arquivos) sob `root`; entradas que somem durante a varredura são ignoradas."""
+    total = files = 0
+    stack = [str(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+                        files += 1
+                except OSError:
+                    continue
+    return total, files
+
+
+def update_data_dir_size(root: Path, snapshot: Path) -> None:
+    """Mede `root` e grava o resultado em `snapshot` para os outros workers (quem tem o flock do janitor)."""
+    total, files = measure_dir(root)
+    tmp = snapshot.with_name(f"{snapshot.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"bytes": total, "files": files}), encoding="utf-8")
+    os.replace(tmp, snapshot)
+    DATA_DIR_BYTES.set(total)
+    DATA_DIR_FILES.set(files)
+
+
+def load_data_dir_size(snapshot: Path) -> None:
+    """Atualiza os gauges com a última medição gravada, sem percorrer o diretório."""
+    try:
+        raw = json.loads(snapshot.read_text(encoding="utf-8"))
+        total, files = int(raw["bytes"]), int(raw["files"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return
+    DATA_DIR_BYTES.set(total)
+    DATA_DIR_FILES.set(files)
+
+
+class MetricsMiddleware:
+    """
+    Conta e cronometra os pedidos pelo template da rota (/api/drafts/{draft_id}),
+    não pelo caminho, para não criar uma série por id. Caminhos sem rota viram
+    "unmatched" e os arquivos montados em /static ficam todos em "/static".
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def _send(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            route = _route_label(scope)
+            method = scope["method"]
+            HTTP_REQUESTS.inc(route, method, str(status))
+            HTTP_DURATION.observe(time.perf_counter() - start, route, method)
+
+
+def _route_label(scope: Scope) -> str:
+    path = getattr(scope.get("route"), "path", None)
+    if path is not None:
+        return path
+    # apps montados (Mount) não deixam a rota no scope, só o prefixo em root_path
+    mount = scope.get("root_path", "")[len(scope.get("app_root_path", "")):]
+    return mount or "unmatched"
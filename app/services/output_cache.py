@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any, Dict, Optional
+
+from app.settings import settings
+
+
+def template_fingerprint(template: Path) -> str:
+    st = template.stat()
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+def cache_key(kind: str, template: Path, placeholders: Dict[str, str], rows: Optional[Dict[str, Any]]) -> str:
+    """Hash do conteúdo normalizado (placeholders + rows) e da versão do template."""
+    body = json.dumps(
+        {
+            "kind": kind,
+            "template": template_fingerprint(template),
+            "placeholders": placeholders,
+            "rows": rows or {},
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+_LINK_PREFIX = ".serve-"
+# links órfãos mais antigos que isso são removidos na carga do índice
+_STALE_LINK_S = 3600
+
+
+def etag_for(key: str, fmt: str) -> str:
+    return f'"{key}-{fmt}"'
+
+
+class OutputCache:
+    """
+    DOCX/PDF gerados, endereçados pelo conteúdo, com despejo LRU por tamanho.
+
+    O índice em memória é montado a partir do diretório na primeira consulta;
+    a ordem LRU vem do mtime dos arquivos, que é renovado a cada acerto. O
+    índice e o total de bytes são deste processo: com vários workers, cada um
+    aplica `max_bytes` ao que ele mesmo viu, e o diretório pode passar disso.
+
+    `get` e `put` devolvem um hard link próprio do chamador (`.serve-*`), não a
+    entrada do cache: o despejo feito por este ou outro worker só remove o
+    nome da entrada, e o arquivo continua legível até o chamador apagar o link.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        found = []
+        stale = time.time() - _STALE_LINK_S
+        for fp in self.root.iterdir():
+            if fp.name.startswith(_LINK_PREFIX):
+                # links que sobraram de um worker interrompido; o mtime é o da
+                # entrada (mesmo inode), então a idade vem do nome
+                created = fp.name[len(_LINK_PREFIX):].split("-", 1)[0]
+                if created.isdigit() and int(created) < stale:
+                    fp.unlink(missing_ok=True)
+                continue
+            if not fp.is_file() or fp.name.startswith("."):
+                continue
+            try:
+                st = fp.stat()
+            except OSError:
+                continue
+            found.append((st.st_mtime, fp.name, st.st_size))
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+            self._total += size
+        self._loaded = True
+
+    def _link(self, path: Path, fmt: str) -> Path:
+        link = self.root / f"{_LINK_PREFIX}{int(time.time())}-{uuid.uuid4().hex}.{fmt}"
+        try:
+            os.link(path, link)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            # sistema de arquivos sem hard link: cópia privada
+            shutil.copyfile(path, link)
+        return link
+
+    def get(self, key: str, fmt: str) -> Optional[Path]:
+        """Link privado para a entrada, ou None se não está (mais) no cache. O chamador remove o link."""
+        name = f"{key}.{fmt}"
+        with self._lock:
+            self._load()
+            if name not in self._entries:
+                return None
+            path = self.root / name
+            try:
+                link = self._link(path, fmt)
+                os.utime(path)
+            except FileNotFoundError:
+                # removido por outro worker
+                self._total -= self._entries.pop(name)
+                return None
+            self._entries.move_to_end(name)
+            return link
+
+    def put(self, key: str, fmt: str, src: Path, *, link: bool = True) -> Optional[Path]:
+        """Grava a entrada; com `link`, devolve um link privado como em `get`."""
+        name = f"{key}.{fmt}"
+        path = self.root / name
+        with self._lock:
+            self._load()
+            with NamedTemporaryFile(dir=self.root, prefix=".tmp-", delete=False) as tmp:
+                with src.open("rb") as fh:
+                    shutil.copyfileobj(fh, tmp)
+            # o link sai do temporário, antes de a entrada ficar visível para outros workers
+            served = self._link(Path(tmp.name), fmt) if link else None
+            size = os.stat(tmp.name).st_size
+            os.replace(tmp.name, path)
+            self._total += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            self._evict()
+        return served
+
+    def _evict(self) -> None:
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._total -= size
+            (self.root / name).unlink(missing_ok=True)
+
+
+_cache: Optional[OutputCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_output_cache() -> Optional[OutputCache]:
+    """None quando o cache está desativado (output_cache_max_bytes = 0)."""
+    global _cache
+    if settings.output_cache_max_bytes <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = OutputCache(settings.data_dir / "cache", settings.output_cache_max_bytes)
+        return _cache
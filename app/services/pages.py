@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from app.services.static_assets import get_manifest
+
+
+@dataclass(frozen=True)
+class Page:
+    body: bytes
+    gzip_body: Optional[bytes]  # None quando não compensa (página vazia ou muito pequena)
+    etag: str
+    gzip_etag: str
+    mtime_ns: int
+
+
+def _build_page(path: Path) -> Page:
+    st = path.stat()
+    html = path.read_text(encoding="utf-8")
+    manifest = get_manifest()
+    if manifest:
+        html = manifest.rewrite_html(html)
+    body = html.encode("utf-8")
+
+    digest = hashlib.sha256(body).hexdigest()[:20]
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    return Page(
+        body=body,
+        gzip_body=compressed if len(compressed) < len(body) else None,
+        etag=f'"{digest}"',
+        gzip_etag=f'"{digest}-gz"',
+        mtime_ns=st.st_mtime_ns,
+    )
+
+
+class PageCache:
+    """
+    Páginas de app/web já codificadas (e em gzip), lidas uma vez.
+
+    Com `reload` (desenvolvimento) o mtime é conferido a cada pedido e a
+    página é relida quando o arquivo muda.
+    """
+
+    def __init__(self, web_dir: Path, reload: bool = False):
+        self.web_dir = web_dir
+        self.reload = reload
+        self._pages: Dict[str, Page] = {}
+        self._lock = threading.Lock()
+
+    def preload(self, names: Iterable[str]) -> None:
+        for name in names:
+            self.get(name)
+
+    def get(self, name: str) -> Page:
+        page = self._pages.get(name)
+        if page is not None and not self.reload:
+            return page
+
+        path = self.web_dir / name
+        if page is not None and path.stat().st_mtime_ns == page.mtime_ns:
+            return page
+
+        with self._lock:
+            page = _build_page(path)
+            self._pages[name] = page
+        return page
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.settings import settings
+
+
+class ParseCache:
+    """
+    Resultado de `parse_doc_to_json` por hash do arquivo enviado.
+
+    Em memória, com validade (TTL) e limite de entradas (LRU). Os dois
+    endpoints de prefill usam a mesma leitura e montam só a própria visão.
+    """
+
+    def __init__(self, max_entries: int, ttl_s: float):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, parsed = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return parsed
+
+    def put(self, key: str, parsed: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, parsed)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_cache: Optional[ParseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_parse_cache() -> Optional[ParseCache]:
+    """None quando o cache está desativado (parse_cache_max_entries = 0)."""
+    global _cache
+    if settings.parse_cache_max_entries <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ParseCache(settings.parse_cache_max_entries, settings.parse_cache_ttl_s)
+        return _cache
@@ -1,24 +1,389 @@
 from __future__ import annotations
 
+import asyncio
+import atexit
+import logging
+import concurrent.futures
+import os
+import shutil
+import signal
 import subprocess
+import threading
+from collections import deque
 from pathlib import Path
+from typing import Deque, Dict, List, Optional, Sequence
+
+from app.services.metrics import LIBREOFFICE_CONVERSIONS, LIBREOFFICE_STARTS, Labels, gauge
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SOFFICE_FLAGS = [
+    "--headless",
+    "--nologo",
+    "--nolockcheck",
+    "--nodefault",
+    "--nofirststartwizard",
+    "--norestore",
+]
+
+
+def _kill_group(proc: subprocess.Popen, timeout: float) -> None:
+    """
+    Encerra o grupo de processos de `proc` (iniciado com `start_new_session`).
+    O `soffice` é só o lançador: quem converte é o `soffice.bin` filho, que
+    sobreviveria a um sinal enviado apenas ao lançador.
+    """
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            break
+        try:
+            proc.wait(timeout=timeout)
+            # o lançador saiu; o grupo ainda pode ter o soffice.bin
+            os.killpg(proc.pid, 0)
+        except subprocess.TimeoutExpired:
+            continue
+        except ProcessLookupError:
+            break
+    proc.wait()
+
+
+def _run_soffice(cmd: Sequence[str], timeout: float) -> None:
+    """`subprocess.run` com o grupo inteiro morto em caso de timeout."""
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        returncode = proc.wait(timeout=timeout)
+    except BaseException:
+        _kill_group(proc, 1)
+        raise
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+
+class _Worker:
+    """
+    Slot de conversão com perfil próprio do LibreOffice (-env:UserInstallation).
+
+    Perfis separados evitam a disputa pelo lock do perfil padrão, permitindo
+    conversões em paralelo. Cada conversão sempre inicia um processo
+    `soffice --convert-to` no perfil do slot. No modo residente, o slot mantém
+    também uma instância headless aberta nesse perfil: o `soffice` da conversão
+    a encontra pelo pipe de IPC que o LibreOffice cria por perfil, repassa a
+    linha de comando e sai quando ela termina. Quem converte é a instância já
+    carregada; o cliente não inicializa o office. Não há ponte UNO (o
+    `--accept`): o módulo `uno` não é importável pelo Python da imagem.
+    Sem o modo residente, cada `soffice` sobe o office inteiro e sai depois.
+    """
+
+    def __init__(self, index: int, profile_dir: Path, resident: bool):
+        self.index = index
+        self.profile_dir = profile_dir
+        self.resident = resident
+        self.proc: Optional[subprocess.Popen] = None
+        self.conversions = 0
+
+    @property
+    def profile_arg(self) -> str:
+        return f"-env:UserInstallation={self.profile_dir.resolve().as_uri()}"
+
+    def warm_up(self) -> None:
+        # cria o perfil antecipadamente; a primeira inicialização é a mais lenta
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        if self.resident:
+            self.start()
+            return
+        _run_soffice(
+            ["soffice", self.profile_arg, *SOFFICE_FLAGS, "--terminate_after_init"],
+            settings.pdf_convert_timeout_s,
+        )
+
+    def start(self) -> None:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        # sem documentos na linha de comando, a instância headless fica aberta
+        # atendendo o pipe de IPC do perfil; sessão própria para que a
+        # reciclagem alcance o soffice.bin, e não só o lançador
+        self.proc = subprocess.Popen(
+            ["soffice", self.profile_arg, *SOFFICE_FLAGS],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        LIBREOFFICE_STARTS.inc()
+        self.conversions = 0
+
+    def stop(self) -> None:
+        proc, self.proc = self.proc, None
+        if proc is not None:
+            _kill_group(proc, 10)
+
+    def restart(self) -> None:
+        self.stop()
+        self.start()
+
+    def is_healthy(self) -> bool:
+        if not self.resident:
+            return True
+        return self.proc is not None and self.proc.poll() is None
+
+    def convert_command(self, src_paths: Sequence[Path], out_dir: Path) -> List[str]:
+        return [
+            "soffice",
+            self.profile_arg,
+            *SOFFICE_FLAGS,
+            "--convert-to", "pdf",
+            "--outdir", str(out_dir),
+            *(str(p) for p in src_paths),
+        ]
+
+
+class LibreOfficePool:
+    """
+    Slots de conversão isolados. Os pedidos excedentes esperam na fila de
+    `_waiters` até que um slot seja devolvido: no event loop, a espera é um
+    future, sem prender thread; na versão síncrona, a própria thread espera.
+    Reiniciar e reciclar instâncias roda num executor com uma thread por
+    slot, separado do executor padrão do loop.
+    """
+
+    def __init__(self, size: int, max_conversions: int, profiles_dir: Path, resident: bool):
+        self.max_conversions = max_conversions
+        self._workers = [
+            _Worker(i, profiles_dir / f"{os.getpid()}-{i}", resident) for i in range(size)
+        ]
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=size, thread_name_prefix="soffice")
+        self._mutex = threading.Lock()
+        self._idle: Deque[_Worker] = deque(self._workers)
+        self._waiters: "Deque[concurrent.futures.Future[_Worker]]" = deque()
+
+    def warm_up(self) -> None:
+        for worker in self._workers:
+            worker.warm_up()
+
+    def _take(self) -> "concurrent.futures.Future[_Worker]":
+        waiter: "concurrent.futures.Future[_Worker]" = concurrent.futures.Future()
+        with self._mutex:
+            if self._idle and not self._waiters:
+                waiter.set_running_or_notify_cancel()
+                waiter.set_result(self._idle.popleft())
+            else:
+                self._waiters.append(waiter)
+        return waiter
+
+    def acquire(self, timeout: float) -> _Worker:
+        waiter = self._take()
+        try:
+            worker = waiter.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            # cancel() falha se um slot chegou junto com o timeout: usa o slot
+            if waiter.cancel():
+                raise RuntimeError("Nenhum conversor de PDF disponível no momento. Tente novamente.")
+            worker = waiter.result()
+        # health check: instância morta (ou ainda não iniciada) é recriada antes do uso
+        if not worker.is_healthy():
+            try:
+                worker.restart()
+            except Exception:
+                self._put_back(worker)
+                raise
+        return worker
+
+    async def acquire_async(self, timeout: float) -> _Worker:
+        waiter = self._take()
+        try:
+            worker = await asyncio.wait_for(asyncio.wrap_future(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.cancel():
+                if isinstance(exc, asyncio.TimeoutError):
+                    raise RuntimeError("Nenhum conversor de PDF disponível no momento. Tente novamente.") from None
+                raise
+            worker = waiter.result()
+            if isinstance(exc, asyncio.CancelledError):
+                self._put_back(worker)
+                raise
+        if not worker.is_healthy():
+            restart = asyncio.get_running_loop().run_in_executor(self._executor, worker.restart)
+            try:
+                await asyncio.shield(restart)
+            except asyncio.CancelledError:
+                restart.add_done_callback(lambda _: self._put_back(worker))
+                raise
+            except Exception:
+                self._put_back(worker)
+                raise
+        return worker
+
+    def release(self, worker: _Worker, *, failed: bool = False) -> None:
+        """Devolve o slot sem bloquear; a reciclagem, se houver, roda no executor do pool."""
+        # recicla após falha ou depois de N conversões (vazamentos de memória do LibreOffice)
+        if worker.resident and (failed or worker.conversions >= self.max_conversions):
+            self._executor.submit(self._restart_and_put_back, worker)
+        else:
+            self._put_back(worker)
+
+    def _restart_and_put_back(self, worker: _Worker) -> None:
+        try:
+            worker.restart()
+        except Exception:
+            # o health check do próximo acquire tenta de novo
+            logger.exception("Falha ao reciclar a instância do LibreOffice")
+        finally:
+            self._put_back(worker)
+
+    def _put_back(self, worker: _Worker) -> None:
+        with self._mutex:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                # falso se quem esperava desistiu (timeout ou cancelamento)
+                if waiter.set_running_or_notify_cancel():
+                    waiter.set_result(worker)
+                    return
+            self._idle.append(worker)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        for worker in self._workers:
+            worker.stop()
+            shutil.rmtree(worker.profile_dir, ignore_errors=True)
+
+    def process_count(self) -> int:
+        return sum(1 for w in self._workers if w.proc is not None and w.proc.poll() is None)
+
+
+_pool: Optional[LibreOfficePool] = None
+_pool_lock = threading.Lock()
+
+
+def _process_gauge() -> Dict[Labels, float]:
+    pool = _pool
+    return {(): pool.process_count() if pool is not None else 0}
+
+
+gauge("ufpb_libreoffice_processes", "Instâncias residentes do LibreOffice em execução neste worker.", fn=_process_gauge)
+
+
+def get_pool() -> LibreOfficePool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = LibreOfficePool(
+                max(1, settings.pdf_max_parallel),
+                settings.pdf_pool_max_conversions,
+                settings.pdf_profiles_dir,
+                settings.pdf_resident_instances,
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def warm_up_pool() -> None:
+    """Cria os perfis (e as instâncias residentes) na subida da aplicação."""
+    try:
+        get_pool().warm_up()
+    except (OSError, subprocess.SubprocessError):
+        logger.warning("LibreOffice indisponível; os perfis serão criados na primeira conversão.", exc_info=True)
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        atexit.unregister(pool.shutdown)
+        pool.shutdown()
+
+
+def convert_to_pdf(src_path: Path, out_dir: Path) -> Path:
+    pool = get_pool()
+    worker = pool.acquire(settings.pdf_pool_acquire_timeout_s)
+    failed = True
+    result = "failed"
+    try:
+        _run_soffice(worker.convert_command([src_path], out_dir), settings.pdf_convert_timeout_s)
+        worker.conversions += 1
+        failed = False
+        result = "ok"
+    except subprocess.TimeoutExpired:
+        result = "timeout"
+        raise
+    finally:
+        LIBREOFFICE_CONVERSIONS.inc(result)
+        pool.release(worker, failed=failed)
+
+    pdf_path = out_dir / (src_path.stem + ".pdf")
+    if not pdf_path.exists():
+        raise RuntimeError("Falha ao converter DOCX para PDF.")
+    return pdf_path
+
 
 def convert_docx_to_pdf(docx_path: Path) -> Path:
-    out_dir = docx_path.parent
-    cmd = [
-        "soffice",
-        "--headless",
-        "--nologo",
-        "--nolockcheck",
-        "--nodefault",
-        "--nofirststartwizard",
-        "--convert-to", "pdf",
-        "--outdir", str(out_dir),
-        str(docx_path),
-    ]
-    subprocess.run(cmd, check=True)
-
-    pdf_path = out_dir / (docx_path.stem + ".pdf")
+    return convert_to_pdf(docx_path, docx_path.parent)
+
+
+async def _convert_async(src_paths: Sequence[Path], out_dir: Path, timeout: float) -> None:
+    """
+    Em caso de timeout ou cancelamento (ex.: cliente desconectou), o processo
+    cliente soffice é morto e a instância residente do slot é reciclada, já
+    que é ela quem executa a conversão órfã.
+    """
+    pool = get_pool()
+    worker = await pool.acquire_async(settings.pdf_pool_acquire_timeout_s)
+    cmd = worker.convert_command(src_paths, out_dir)
+    failed = True
+    result = "failed"
+    proc = None
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        returncode = await asyncio.wait_for(proc.wait(), timeout=timeout)
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmd)
+        worker.conversions += 1
+        failed = False
+        result = "ok"
+    except asyncio.TimeoutError:
+        result = "timeout"
+        raise
+    except asyncio.CancelledError:
+        result = "cancelled"
+        raise
+    finally:
+        LIBREOFFICE_CONVERSIONS.inc(result)
+        if proc is not None and proc.returncode is None:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        pool.release(worker, failed=failed)
+
+
+async def convert_to_pdf_async(src_path: Path, out_dir: Path) -> Path:
+    """Versão não bloqueante de `convert_to_pdf`."""
+    await _convert_async([src_path], out_dir, settings.pdf_convert_timeout_s)
+
+    pdf_path = out_dir / (src_path.stem + ".pdf")
     if not pdf_path.exists():
         raise RuntimeError("Falha ao converter DOCX para PDF.")
     return pdf_path
+
+
+async def convert_docx_to_pdf_async(docx_path: Path) -> Path:
+    return await convert_to_pdf_async(docx_path, docx_path.parent)
+
+
+async def convert_many_to_pdf_async(src_paths: Sequence[Path], out_dir: Path) -> List[Optional[Path]]:
+    """
+    Converte vários arquivos numa única chamada do soffice, amortizando a
+    inicialização. Os nomes (stem) precisam ser únicos; arquivos que não
+    puderam ser convertidos aparecem como None.
+    """
+    if not src_paths:
+        return []
+    await _convert_async(src_paths, out_dir, settings.pdf_batch_timeout_s)
+    pdfs = [out_dir / (p.stem + ".pdf") for p in src_paths]
+    return [p if p.exists() else None for p in pdfs]
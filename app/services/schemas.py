@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from jsonschema import Draft202012Validator
+from jsonschema.exceptions import ValidationError
+
+SCHEMAS_DIR = Path(__file__).resolve().parent.parent / "schemas"
+
+# Primeira etapa da validação: só a estrutura (objetos, listas, campos presentes,
+# tipos e enums). Tamanhos, padrões, formatos e as regras condicionais ficam com
+# validate_anexo1/2, que dão mensagens específicas para cada caso. Valores null
+# passam aqui (o front e o prefill mandam null em campos vazios) e também ficam
+# com os validadores; só não são aceitos nos objetos e listas obrigatórios.
+_STRUCTURAL_KEYWORDS = frozenset({
+    "$schema", "$id", "$defs", "$ref", "type", "required", "properties", "items", "anyOf", "enum", "const",
+})
+
+_SCALAR_TYPES = frozenset({"string", "boolean", "number", "integer"})
+
+_TYPE_NAMES = {
+    "object": "um objeto",
+    "array": "uma lista",
+    "string": "um texto",
+    "boolean": "verdadeiro/falso",
+    "number": "um número",
+    "integer": "um número inteiro",
+}
+
+
+def _is_leaf(schema: Dict[str, Any]) -> bool:
+    type_ = schema.get("type")
+    types = type_ if isinstance(type_, list) else [type_]
+    return type_ is not None and all(t in _SCALAR_TYPES for t in types)
+
+
+def _nullable(schema: Dict[str, Any]) -> Dict[str, Any]:
+    if "type" not in schema:
+        # $ref/anyOf sem tipo próprio
+        return {"anyOf": [schema, {"type": "null"}]}
+    out = dict(schema)
+    types = out["type"] if isinstance(out["type"], list) else [out["type"]]
+    out["type"] = [*types, "null"]
+    if "enum" in out:
+        out["enum"] = [*out["enum"], None]
+    return out
+
+
+def _structural(schema: Dict[str, Any], nullable: bool = False) -> Dict[str, Any]:
+    """
+    Só as palavras de estrutura. `nullable` aceita null no lugar do valor:
+    vale para folhas (textos, booleanos, números), itens de lista e
+    objetos opcionais.
+    """
+    required = set(schema.get("required", ()))
+    out: Dict[str, Any] = {}
+    for key, value in schema.items():
+        if key not in _STRUCTURAL_KEYWORDS:
+            continue
+        if key == "properties":
+            value = {
+                name: _structural(sub, nullable=_is_leaf(sub) or name not in required)
+                for name, sub in value.items()
+            }
+        elif key == "$defs":
+            value = {name: _structural(sub) for name, sub in value.items()}
+        elif key == "items":
+            value = _structural(value, nullable=True)
+        elif key == "anyOf":
+            value = [_structural(sub) for sub in value]
+        out[key] = value
+    return _nullable(out) if nullable else out
+
+
+def _compile(kind: str) -> Draft202012Validator:
+    schema = json.loads((SCHEMAS_DIR / f"{kind}.schema.json").read_text(encoding="utf-8"))
+    structural = _structural(schema)
+    Draft202012Validator.check_schema(structural)
+    return Draft202012Validator(structural)
+
+
+# compilados uma vez, na importação
+_VALIDATORS = {kind: _compile(kind) for kind in ("anexo1", "anexo2")}
+
+
+def _field(path) -> str:
+    return ".".join(str(p) for p in path)
+
+
+def _expected(type_: Any) -> str:
+    types = type_ if isinstance(type_, list) else [type_]
+    return " ou ".join(_TYPE_NAMES.get(t, t) for t in types if t != "null")
+
+
+def _expand(error: ValidationError) -> Iterator[ValidationError]:
+    """
+    Troca a falha de um anyOf pelos erros do ramo mais próximo do valor
+    (ex.: o trecho único com `data_hora` errada, e não "esperado uma lista").
+    Ramos cujo tipo nem bate com o valor são descartados; se nenhum sobra,
+    fica o próprio anyOf, relatado como tipo inválido.
+    """
+    if error.validator != "anyOf":
+        yield error
+        return
+
+    branches: Dict[Any, List[ValidationError]] = {}
+    for sub in error.context:
+        branches.setdefault(sub.schema_path[0], []).append(sub)
+    matching = [
+        errs for errs in branches.values()
+        if not any(e.validator == "type" and not e.relative_path for e in errs)
+    ]
+    if not matching:
+        yield error
+        return
+    for sub in min(matching, key=len):
+        yield from _expand(sub)
+
+
+def _anyof_types(error: ValidationError) -> List[str]:
+    return [
+        sub.validator_value for sub in error.context
+        if sub.validator == "type" and not sub.relative_path and isinstance(sub.validator_value, str)
+    ]
+
+
+def schema_errors(kind: str, payload: Any) -> List[Dict[str, str]]:
+    """
+    Erros de estrutura do payload (`kind` = "anexo1" | "anexo2") no formato
+    `{"field", "message"}`; lista vazia quando a estrutura está correta.
+    """
+    errors: Dict[str, str] = {}
+    found = (e for error in _VALIDATORS[kind].iter_errors(payload) for e in _expand(error))
+    for error in found:
+        path = list(error.absolute_path)
+        if error.validator == "required":
+            # um erro por campo ausente; todos apontam para o mesmo objeto
+            for name in error.validator_value:
+                if isinstance(error.instance, dict) and name not in error.instance:
+                    errors.setdefault(_field(path + [name]), "Campo obrigatório ausente.")
+            continue
+        if error.validator == "type":
+            message = f"Formato inválido: esperado {_expected(error.validator_value)}."
+        elif error.validator == "anyOf" and _anyof_types(error):
+            message = f"Formato inválido: esperado {_expected(_anyof_types(error))}."
+        elif error.validator in ("enum", "const"):
+            allowed = error.validator_value if error.validator == "enum" else [error.validator_value]
+            message = "Valor não permitido. Use: " + ", ".join(str(v) for v in allowed if v is not None) + "."
+        else:
+            message = "Formato inválido."
+        errors.setdefault(_field(path), message)
+
+    return [{"field": field, "message": message} for field, message in sorted(errors.items())]
@@ -0,0 +1,200 @@
+"""
+Arquivos de app/static com nome por hash do conteúdo, já minificados e
+comprimidos (gzip e, se o módulo `brotli` existir, br).
+
+Geração (na raiz do repositório; o Dockerfile roda no build da imagem):
+    python -m app.services.static_assets
+
+Sem o manifesto (ex.: em desenvolvimento) tudo continua servido de
+/static/<nome> como antes.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import logging
+import mimetypes
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+DIST_NAME = "dist"
+MANIFEST_NAME = "manifest.json"
+
+# PNG e afins já são comprimidos; gzip/br só valem para texto
+_COMPRESSIBLE = {".js", ".css", ".svg", ".json", ".txt", ".html"}
+_MIN_COMPRESS_BYTES = 1024
+_ENCODING_EXT = {"br": ".br", "gzip": ".gz"}
+
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_CSS_SPACE_RE = re.compile(r"\s+")
+_CSS_PUNCT_RE = re.compile(r"\s*([{};,>])\s*")
+_STATIC_URL_RE = re.compile(r"""(["'])/static/([\w.\-]+)\1""")
+
+
+# --- build ---------------------------------------------------------------------
+
+def _minify_css(data: bytes) -> bytes:
+    css = _CSS_COMMENT_RE.sub("", data.decode("utf-8"))
+    css = _CSS_SPACE_RE.sub(" ", css)
+    css = _CSS_PUNCT_RE.sub(r"\1", css)
+    return css.replace(";}", "}").strip().encode("utf-8")
+
+
+def _minify_js(data: bytes) -> bytes:
+    try:
+        import rjsmin
+    except ImportError:
+        logger.warning("rjsmin indisponível; JS copiado sem minificar.")
+        return data
+    return rjsmin.jsmin(data.decode("utf-8")).encode("utf-8")
+
+
+def _optimize_png(data: bytes) -> bytes:
+    try:
+        from PIL import Image
+    except ImportError:
+        return data
+    buf = io.BytesIO()
+    with Image.open(io.BytesIO(data)) as img:
+        img.save(buf, format="PNG", optimize=True)
+    out = buf.getvalue()
+    return out if len(out) < len(data) else data
+
+
+_TRANSFORMS = {".css": _minify_css, ".js": _minify_js, ".png": _optimize_png}
+
+
+def _compressed_variants(data: bytes) -> Dict[str, bytes]:
+    variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        logger.warning("brotli indisponível; só a variante gzip foi gerada.")
+    else:
+        variants["br"] = brotli.compress(data, quality=11)
+    return {enc: blob for enc, blob in variants.items() if len(blob) < len(data)}
+
+
+def build(src: Path, out: Optional[Path] = None) -> Dict[str, Dict[str, object]]:
+    """Gera `out` (padrão: src/dist) do zero e devolve o manifesto."""
+    out = out or src / DIST_NAME
+    shutil.rmtree(out, ignore_errors=True)
+    out.mkdir(parents=True)
+
+    manifest: Dict[str, Dict[str, object]] = {}
+    for fp in sorted(src.iterdir()):
+        if not fp.is_file():
+            continue
+        data = fp.read_bytes()
+        transform = _TRANSFORMS.get(fp.suffix.lower())
+        if transform:
+            data = transform(data)
+
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        name = f"{fp.stem}.{digest}{fp.suffix}"
+        (out / name).write_bytes(data)
+
+        encodings: List[str] = []
+        if fp.suffix.lower() in _COMPRESSIBLE and len(data) >= _MIN_COMPRESS_BYTES:
+            for enc, blob in _compressed_variants(data).items():
+                (out / (name + _ENCODING_EXT[enc])).write_bytes(blob)
+                encodings.append(enc)
+        manifest[fp.name] = {"file": name, "encodings": sorted(encodings)}
+
+    (out / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    return manifest
+
+
+# --- runtime -------------------------------------------------------------------
+
+class AssetManifest:
+    """Manifesto de dist/: nome original -> nome com hash e variantes comprimidas."""
+
+    def __init__(self, entries: Dict[str, Dict[str, object]]):
+        self.urls = {name: f"/static/{DIST_NAME}/{e['file']}" for name, e in entries.items()}
+        self.encodings = {f"{DIST_NAME}/{e['file']}": tuple(e.get("encodings", ())) for e in entries.values()}
+
+    @classmethod
+    def load(cls, static_dir: Path) -> Optional["AssetManifest"]:
+        path = static_dir / DIST_NAME / MANIFEST_NAME
+        try:
+            return cls(json.loads(path.read_text(encoding="utf-8")))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning("Manifesto de arquivos estáticos inválido em %s; servindo os originais.", path)
+            return None
+
+    def rewrite_html(self, html: str) -> str:
+        """Troca /static/<nome> pelos nomes com hash nas páginas."""
+        def _sub(m: "re.Match[str]") -> str:
+            url = self.urls.get(m.group(2))
+            return f"{m.group(1)}{url}{m.group(1)}" if url else m.group(0)
+
+        return _STATIC_URL_RE.sub(_sub, html)
+
+
+def accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if token:
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+def pick_variant(path: str, accept_encoding: str, manifest: AssetManifest) -> Tuple[str, Optional[str]]:
+    """Caminho a servir e o Content-Encoding correspondente (br > gzip > original)."""
+    available = manifest.encodings.get(path, ())
+    if available:
+        accepted = accepted_encodings(accept_encoding)
+        for enc in ("br", "gzip"):
+            if enc in available and (enc in accepted or "*" in accepted):
+                return path + _ENCODING_EXT[enc], enc
+    return path, None
+
+
+_manifest: Optional[AssetManifest] = None
+_manifest_loaded = False
+_manifest_lock = threading.Lock()
+
+
+def get_manifest() -> Optional[AssetManifest]:
+    """None quando não há build (app/static/dist/manifest.json)."""
+    global _manifest, _manifest_loaded
+    with _manifest_lock:
+        if not _manifest_loaded:
+            _manifest = AssetManifest.load(settings.static_dir)
+            _manifest_loaded = True
+        return _manifest
+
+
+def media_type_for(path: str) -> str:
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--src", type=Path, default=settings.static_dir)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    result = build(args.src)
+    for original, entry in sorted(result.items()):
+        logger.info("%-14s -> %s %s", original, entry["file"], " ".join(entry["encodings"]))
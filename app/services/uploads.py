@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import IO, Collection, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+try:
+    import python_multipart as multipart
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # versões antigas do python-multipart
+    import multipart
+    from multipart.exceptions import FormParserError
+    from multipart.multipart import parse_options_header
+
+# assinatura no início do arquivo para cada extensão aceita
+_MAGIC = {
+    ".pdf": b"%PDF-",  # pode vir depois de lixo no cabeçalho (até 1 KB)
+    ".docx": b"PK\x03\x04",
+    ".doc": b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",
+}
+_PDF_HEADER_WINDOW = 1024
+# cabeçalhos das partes e outros campos do formulário, além do arquivo
+_FORM_OVERHEAD = 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+class UploadFormatError(ValueError):
+    pass
+
+
+def sniff_format(head: bytes, suffix: str) -> bool:
+    magic = _MAGIC.get(suffix)
+    if magic is None:
+        return False
+    if suffix == ".pdf":
+        return magic in head[:_PDF_HEADER_WINDOW]
+    return head.startswith(magic)
+
+
+@dataclass(frozen=True)
+class ReceivedUpload:
+    path: Path  # temporário; o chamador remove
+    filename: str
+    suffix: str
+    digest: str  # SHA-256 do conteúdo
+    size: int
+
+
+class _FileReceiver:
+    """
+    Recebe os eventos do parser multipart e grava só a parte `field`.
+
+    O início do arquivo fica em memória até dar para conferir a assinatura;
+    o temporário só é criado depois disso. Tamanho e hash são contados
+    sobre os bytes à medida que chegam.
+    """
+
+    def __init__(self, field: str, suffixes: Collection[str], max_bytes: int):
+        self.field = field
+        self.suffixes = suffixes
+        self.max_bytes = max_bytes
+        self.filename: Optional[str] = None
+        self.suffix = ""
+        self.size = 0
+        self.done = False
+        self._digest = hashlib.sha256()
+        self._head = b""
+        self._sniffed = False
+        self._file: Optional[IO[bytes]] = None
+        self._path: Optional[Path] = None
+        self._pending: List[bytes] = []
+        # estado da parte corrente
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._active = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        }
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self._active = False
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, params = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = params.get(b"name", b"").decode("utf-8", "replace")
+        filename = params.get(b"filename")
+        if name != self.field or not filename or self.filename is not None:
+            return
+        self.filename = filename.decode("utf-8", "replace")
+        self.suffix = Path(self.filename).suffix.lower()
+        if self.suffix not in self.suffixes:
+            raise UploadFormatError("Formato não suportado. Use PDF, DOC ou DOCX do Anexo I.")
+        self._active = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._active:
+            return
+        chunk = data[start:end]
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLargeError(
+                f"Arquivo muito grande. O limite é de {self.max_bytes // (1024 * 1024)} MB."
+            )
+        self._digest.update(chunk)
+        if self._sniffed:
+            self._pending.append(chunk)
+            return
+        self._head += chunk
+        if len(self._head) >= _PDF_HEADER_WINDOW:
+            self._sniff()
+
+    def _on_part_end(self) -> None:
+        if not self._active:
+            return
+        self._active = False
+        if not self._sniffed:
+            self._sniff()
+        self.done = True
+
+    def _sniff(self) -> None:
+        if not self._head:
+            raise UploadFormatError("Arquivo vazio. Verifique se o Anexo I foi exportado corretamente.")
+        if not sniff_format(self._head, self.suffix):
+            raise UploadFormatError("O conteúdo do arquivo não corresponde a um PDF, DOC ou DOCX válido.")
+        self._sniffed = True
+        self._pending.append(self._head)
+        self._head = b""
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def write_pending(self) -> None:
+        """Grava o que chegou desde a última chamada (no threadpool)."""
+        if not self._pending:
+            return
+        if self._file is None:
+            self._file = NamedTemporaryFile(delete=False, suffix=self.suffix)
+            self._path = Path(self._file.name)
+        self._file.write(b"".join(self._pending))
+        self._pending = []
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    def discard(self) -> None:
+        self.close()
+        if self._path is not None:
+            self._path.unlink(missing_ok=True)
+
+    def result(self) -> ReceivedUpload:
+        if not self.done:
+            raise UploadFormatError("Envie o arquivo do Anexo I preenchido em PDF, DOC ou DOCX.")
+        self.close()
+        return ReceivedUpload(self._path, self.filename, self.suffix, self._digest.hexdigest(), self.size)
+
+
+async def receive_upload(request: Request, field: str, suffixes: Collection[str], max_bytes: int) -> ReceivedUpload:
+    """
+    Lê o corpo multipart direto do `request.stream()`, sem o parser de
+    formulários do Starlette (que guardaria o corpo inteiro antes do handler).
+    O limite vale para os bytes recebidos, com ou sem Content-Length, e a
+    assinatura do arquivo é conferida antes de qualquer gravação; o conteúdo
+    vai uma única vez para o temporário que o parser lê depois.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadFormatError("Envie o arquivo do Anexo I como multipart/form-data.")
+
+    receiver = _FileReceiver(field, suffixes, max_bytes)
+    parser = multipart.MultipartParser(boundary, receiver.callbacks())
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes + _FORM_OVERHEAD:
+                raise UploadTooLargeError(
+                    f"Arquivo muito grande. O limite é de {max_bytes // (1024 * 1024)} MB."
+                )
+            try:
+                parser.write(chunk)
+            except FormParserError as exc:
+                raise UploadFormatError("Formulário de envio inválido.") from exc
+            if receiver.has_pending:
+                await run_in_threadpool(receiver.write_pending)
+        parser.finalize()
+        return receiver.result()
+    except BaseException:
+        receiver.discard()
+        raise
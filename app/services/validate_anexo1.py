@@ -5,6 +5,7 @@ from typing import Any, Dict, Tuple
 
 from app.settings import settings
 from app.services.placeholders import build_placeholders_anexo1
+from app.services.schemas import schema_errors
 
 def _parse_date(s: str) -> date:
     return date.fromisoformat(s)
@@ -32,7 +33,11 @@ def _fmt_dt_opt(value: Any) -> str:
         return ""
 
 def validate_and_enrich_anexo1(payload: Dict[str, Any]) -> Dict[str, Any]:
-    errors = []
+    # estrutura primeiro (schema): campos ausentes ou de tipo errado param aqui
+    errors = schema_errors("anexo1", payload)
+    if errors:
+        flags = payload.get("flags") if isinstance(payload, dict) else None
+        return {"ok": False, "errors": errors, "flags": flags if isinstance(flags, dict) else {}}
 
     # obrigatórios mínimos (wizard garante, mas backend reforça)
     tipo = payload.get("tipo_solicitacao")
@@ -5,6 +5,7 @@ from typing import Any, Dict
 
 from app.settings import settings
 from app.services.placeholders import build_placeholders_anexo2
+from app.services.schemas import schema_errors
 
 def _parse_date(s: str) -> date:
     return date.fromisoformat(s)
@@ -28,7 +29,11 @@ def _fmt_dt_opt(value: Any) -> str:
         return ""
 
 def validate_and_enrich_anexo2(payload: Dict[str, Any]) -> Dict[str, Any]:
-    errors = []
+    # estrutura primeiro (schema): campos ausentes ou de tipo errado param aqui
+    errors = schema_errors("anexo2", payload)
+    if errors:
+        flags = payload.get("flags") if isinstance(payload, dict) else None
+        return {"ok": False, "errors": errors, "flags": flags if isinstance(flags, dict) else {}}
 
     # datas ida/retorno
     try:
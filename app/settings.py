@@ -1,13 +1,76 @@
+import os
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
 @dataclass(frozen=True)
 class Settings:
     data_dir: Path = Path("/app/data")
     templates_dir: Path = Path("/app/app/templates")
+    # arquivos estáticos; o build (python -m app.services.static_assets) gera static_dir/dist
+    static_dir: Path = Path("app/static")
+    static_max_age_s: int = 365 * 86400
+    # páginas de app/web ficam em memória; True relê quando o arquivo muda (desenvolvimento)
+    html_reload: bool = False
+    # gzip das respostas de texto (preview, rascunhos); nível 0 desativa. DOCX/PDF não passam por ele
+    compress_min_bytes: int = 1024
+    compress_level: int = 5
+    # serializador das respostas JSON da API: "json" ou "orjson" (se instalado)
+    json_renderer: str = "json"
     # conforme o formulário:
     prazo_sem_passagens_dias: int = 10
     prazo_com_passagens_dias: int = 30
     prazo_relatorio_dias: int = 5
+    # conversão DOCX->PDF: um slot (perfil isolado do LibreOffice) por núcleo, até 4
+    pdf_max_parallel: int = min(os.cpu_count() or 1, 4)
+    # mantém um LibreOffice aberto por slot; o `soffice --convert-to` de cada conversão só repassa o pedido a ele
+    pdf_resident_instances: bool = True
+    pdf_pool_max_conversions: int = 200
+    pdf_pool_acquire_timeout_s: float = 60.0
+    pdf_convert_timeout_s: float = 120.0
+    pdf_profiles_dir: Path = Path("/tmp/ufpb-wizard-lo")
+    pdf_batch_timeout_s: float = 600.0
+    batch_max_items: int = 100
+    # renderização DOCX em processos separados; tempo máximo por etapa da geração
+    render_workers: int = 2
+    # motor de renderização: "python-docx" ou "lxml" (direto no word/document.xml)
+    docx_renderer: str = "python-docx"
+    # cache de DOCX/PDF gerados em data_dir/cache (0 desativa). O limite vale por worker do
+    # uvicorn: cada um despeja pelo próprio índice, então o diretório pode chegar a N workers x limite
+    output_cache_max_bytes: int = 512 * 1024 * 1024
+    render_timeout_s: float = 30.0
+    prefill_timeout_s: float = 90.0
+    # tamanho máximo do Anexo I enviado para prefill
+    upload_max_bytes: int = 20 * 1024 * 1024
+    # leitura do Anexo I em processos isolados, com limite de memória e de CPU por arquivo
+    parse_workers: int = 2
+    parse_memory_limit_mb: int = 1024
+    parse_cpu_limit_s: int = 30
+    parse_max_tasks_per_child: int = 50
+    # leitura de PDF no prefill: "pdfplumber" ou "fast" (pypdfium2, sem análise de layout)
+    pdf_extract_mode: str = "pdfplumber"
+    pdf_extract_max_pages: int = 5
+    pdf_extract_time_budget_s: float = 10.0
+    # leitura do Anexo I enviado, por hash do arquivo (0 desativa)
+    parse_cache_max_entries: int = 256
+    parse_cache_ttl_s: float = 3600.0
+    # geração assíncrona (?async=1): workers, fila máxima antes do 429 e retenção em data_dir/jobs
+    jobs_workers: int = 2
+    jobs_max_queue: int = 20
+    jobs_retry_after_s: int = 15
+    jobs_retention_days: int = 15
+    # rascunhos: "file" (um JSON por rascunho em data_dir) ou "sqlite" (WAL)
+    draft_backend: str = "file"
+    draft_sqlite_path: Optional[Path] = None  # padrão: data_dir/db/drafts.sqlite3
+    draft_sqlite_pool_size: int = 4
+    # cache em memória dos rascunhos lidos (por worker), conferido pela versão no store; 0 desativa
+    draft_cache_max_bytes: int = 16 * 1024 * 1024
+    # expiração dos rascunhos em segundo plano: retenção, intervalo entre passadas e lotes
+    draft_retention_days: int = 15
+    janitor_interval_s: float = 3600.0
+    janitor_batch_size: int = 500
+    janitor_batch_pause_s: float = 0.5
+    # /metrics (formato do Prometheus), por worker; False remove o endpoint e a contagem dos pedidos
+    metrics_enabled: bool = True
 
 settings = Settings()
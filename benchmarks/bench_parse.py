@@ -0,0 +1,280 @@
+"""
+Compara o parser de seções do Anexo I com a versão anterior (regex sobre o
+texto inteiro, preservada abaixo) num conjunto de textos de exemplo: os
+arquivos de data/, documentos gerados pelos templates e variações com ruído.
+Confere que as saídas são iguais e mede o tempo de cada um.
+
+Uso (na raiz do repositório):
+    python benchmarks/bench_parse.py [--repeat 50] [--seed 7]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from app.services.anexo1_import import (  # noqa: E402
+    _extract_text,
+    clean,
+    parse_text_to_json,
+)
+from app.services.docx_render import render_docx_from_template  # noqa: E402
+from app.services.validate_anexo1 import validate_and_enrich_anexo1  # noqa: E402
+from bench_render import ANEXO1, _with_trechos  # noqa: E402
+
+DATA_DIR = ROOT / "data"
+TEMPLATE = ROOT / "app" / "templates" / "anexo1_template.docx"
+
+
+# --- parser anterior ---------------------------------------------------------
+
+def find_one(pattern: str, text: str, flags=re.IGNORECASE) -> Optional[str]:
+    m = re.search(pattern, text, flags)
+    return m.group(1).strip() if m else None
+
+
+STOP_LABELS_PATTERN = (
+    r"(?:Nome completo|Cargo ou Fun[cç][ãa]o que Ocupa|CPF|RG|Data de Nascimento|"
+    r"Siape|Nome da M[ãa]e|Endere[cç]o|Telefone|Email|Dados Banc[aá]rios|Banco|Ag[êe]ncia|Conta)\s*:"
+)
+
+
+def find_with_stop(label_regex: str, text: str) -> Optional[str]:
+    """
+    Capture value after label until the next known label (or end).
+    Helps when DOCX coloca vários campos na mesma linha.
+    """
+    pattern = rf"{label_regex}:\s*(.+?)\s*(?={STOP_LABELS_PATTERN}|$)"
+    m = re.search(pattern, text, flags=re.IGNORECASE | re.DOTALL)
+    return m.group(1).strip() if m else None
+
+
+def find_block(start_pat: str, end_pat: str, text: str) -> Optional[str]:
+    m = re.search(start_pat + r"(.*?)" + end_pat, text, flags=re.IGNORECASE | re.DOTALL)
+    return m.group(1).strip() if m else None
+
+
+def parse_debito_recurso(text: str) -> Optional[str]:
+    block = find_block(r"D[ÉE]BITO DO RECURSO:\s*", r"$", text) or ""
+
+    if re.search(r"\(\s*[xX]\s*\)\s*CCHSA\b", block):
+        return "CCHSA"
+    if re.search(r"\(\s*[xX]\s*\)\s*CAVN\b", block):
+        return "CAVN"
+    if re.search(r"\(\s*[xX]\s*\)\s*PROJETO\b", block):
+        return "PROJETO"
+
+    m_outros = re.search(r"\(\s*[xX]\s*\)\s*Outros:\s*(.+)", block, flags=re.IGNORECASE)
+    if m_outros:
+        val = m_outros.group(1).strip()
+        return f"OUTROS: {val}" if val else "OUTROS"
+
+    m_outros2 = re.search(r"Outros:\s*(.+)", block, flags=re.IGNORECASE)
+    if m_outros2 and m_outros2.group(1).strip():
+        return f"OUTROS: {m_outros2.group(1).strip()}"
+    return None
+
+
+def parse_destino(text: str, tipo: str) -> Dict[str, Optional[str]]:
+    if tipo.lower() == "ida":
+        block = find_block(r"DESTINO\s*\(Ida\):\s*", r"DESTINO\s*\(Retorno\):", text) or ""
+    else:
+        block = find_block(r"DESTINO\s*\(Retorno\):\s*", r"DATA/HORA DA MISS[ÃA]O:", text) or ""
+
+    pattern = (
+        r"Local\s+de\s+Origem:\s*(?P<origem>.*?)\s*"
+        r"(?=Local\s+de\s+Destino:)"
+        r"Local\s+de\s+Destino:\s*(?P<destino>.*?)\s*"
+        r"(?=Data\s*/?\s*Hora:)"
+        r"Data\s*/?\s*Hora:\s*(?P<datahora>[0-3]\d/[0-1]\d/\d{4}\s+\d{2}:\d{2})"
+    )
+
+    m = re.search(pattern, block, flags=re.IGNORECASE | re.DOTALL)
+    if not m:
+        origem = find_one(r"Local\s+de\s+Origem:\s*(.+)", block, flags=re.IGNORECASE | re.DOTALL)
+        destino = find_one(r"Local\s+de\s+Destino:\s*(.+)", block, flags=re.IGNORECASE | re.DOTALL)
+        dh = find_one(r"Data\s*/?\s*Hora:\s*([0-3]\d/[0-1]\d/\d{4}\s+\d{2}:\d{2})", block, flags=re.IGNORECASE | re.DOTALL)
+        return {"local_origem": origem, "local_destino": destino, "data_hora": dh}
+
+    return {
+        "local_origem": m.group("origem").strip(),
+        "local_destino": m.group("destino").strip(),
+        "data_hora": m.group("datahora").strip(),
+    }
+
+
+def parse_missao(text: str) -> Dict[str, Optional[str]]:
+    block = find_block(r"DATA/HORA DA MISS[ÃA]O:\s*", r"D[ÉE]BITO DO RECURSO:", text) or ""
+    inicio = find_one(r"Data/Hora In[ií]cio:\s*([0-3]\d/[0-1]\d/\d{4}\s+\d{2}:\d{2})", block, flags=re.IGNORECASE | re.DOTALL)
+    termino = find_one(r"Data/Hora T[eé]rmino:\s*([0-3]\d/[0-1]\d/\d{4}\s+\d{2}:\d{2})", block, flags=re.IGNORECASE | re.DOTALL)
+    return {"inicio": inicio, "termino": termino}
+
+
+def parse_identificacao(text: str) -> Dict[str, Any]:
+    block = find_block(r"IDENTIFICAÇ[ÃA]O\s*", r"DESCRIÇ[ÃA]O DO MOTIVO DA VIAGEM:", text) or ""
+
+    nome = find_with_stop(r"Nome completo", block)
+    cargo = find_with_stop(r"Cargo ou Fun[cç][aã]o que Ocupa", block)
+
+    cpf = find_with_stop(r"CPF", block) or find_one(r"CPF:\s*([0-9\.\-]{11,14}|\d{11})", block)
+    rg = find_with_stop(r"RG", block) or find_one(r"RG:\s*([0-9\.\-]+)", block)
+
+    nasc = find_with_stop(r"Data de Nascimento", block) or find_one(r"Data de Nascimento:\s*([0-3]\d/[0-1]\d/\d{4})", block)
+    siape = find_with_stop(r"Siape", block) or find_one(r"Siape:\s*(\d+)", block)
+
+    mae = find_with_stop(r"Nome da M[ãa]e", block)
+    endereco = find_with_stop(r"Endere[cç]o", block)
+
+    telefone = find_with_stop(r"Telefone", block) or find_one(r"Telefone:\s*([\d\(\)\-\s]+)", block)
+    email = find_with_stop(r"Email", block) or find_one(r"Email:\s*([^\s]+@[^\s]+)", block)
+    if email:
+        email = re.sub(r"\s*Dados Banc[aá]rios:\s*$", "", email, flags=re.IGNORECASE).strip()
+
+    banco = find_with_stop(r"Banco", block) or find_one(r"Banco:\s*([A-Za-z0-9]+)", block)
+    agencia = find_with_stop(r"Ag[êe]ncia", block) or find_one(r"Ag[êe]ncia:\s*([0-9]+)", block)
+    conta = find_with_stop(r"Conta", block) or find_one(r"Conta:\s*([0-9]+)", block)
+
+    return {
+        "nome_completo": nome,
+        "cargo_funcao": cargo,
+        "cpf": cpf,
+        "rg": rg,
+        "data_nascimento": nasc,
+        "siape": siape,
+        "nome_mae": mae,
+        "endereco": endereco,
+        "telefone": telefone,
+        "email": email,
+        "dados_bancarios": {"banco": banco, "agencia": agencia, "conta": conta},
+    }
+
+
+def parse_motivo_viagem(text: str) -> Optional[str]:
+    block = find_block(r"DESCRIÇ[ÃA]O DO MOTIVO DA VIAGEM:\s*", r"DESTINO\s*\(Ida\):", text)
+    return block.strip() if block else None
+
+
+def legacy_parse(text: str) -> Dict[str, Any]:
+    return clean({
+        "identificacao": parse_identificacao(text),
+        "motivo_viagem": parse_motivo_viagem(text),
+        "destino_ida": parse_destino(text, "Ida"),
+        "destino_retorno": parse_destino(text, "Retorno"),
+        "missao": parse_missao(text),
+        "debito_recurso": parse_debito_recurso(text),
+    })
+
+
+# --- corpus ------------------------------------------------------------------
+
+def _sample_texts() -> List[str]:
+    texts = []
+    for fp in sorted(DATA_DIR.glob("anexo1_*")):
+        if fp.suffix.lower() in (".pdf", ".docx"):
+            texts.append(_extract_text(fp))
+    return texts
+
+
+def _rendered_texts(rng: random.Random) -> List[str]:
+    debitos = [
+        {"tipo": "cchsa", "detalhe": ""},
+        {"tipo": "cavn", "detalhe": ""},
+        {"tipo": "projeto", "detalhe": "Projeto de extensão"},
+        {"tipo": "outros", "detalhe": "Reitoria"},
+    ]
+    texts = []
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "anexo1.docx"
+        for i, debito in enumerate(debitos * 2):
+            payload = _with_trechos(ANEXO1, "trechos", rng.randint(1, 3))
+            payload["debito_recurso"] = debito
+            payload["servidor"]["nome_completo"] = rng.choice(["Maria da Silva", "João Pereira", "Ana"]) + f" {i}"
+            payload["motivo_viagem"] = " ".join(rng.choice(["reunião", "congresso", "Local:", "CPF", "visita"]) for _ in range(rng.randint(3, 40)))
+            enriched = validate_and_enrich_anexo1(payload)
+            if not enriched.get("ok"):
+                continue
+            render_docx_from_template(TEMPLATE, out, enriched["placeholders"], rows=enriched["rows"])
+            texts.append(_extract_text(out))
+    return texts
+
+
+def _noisy(text: str, rng: random.Random) -> str:
+    lines = text.split("\n")
+    op = rng.choice(["drop", "dup", "swap", "junk", "blank_values"])
+    if op == "drop" and len(lines) > 1:
+        del lines[rng.randrange(len(lines))]
+    elif op == "dup":
+        i = rng.randrange(len(lines))
+        lines.insert(i, lines[i])
+    elif op == "swap" and len(lines) > 1:
+        i, j = rng.randrange(len(lines)), rng.randrange(len(lines))
+        lines[i], lines[j] = lines[j], lines[i]
+    elif op == "junk":
+        lines.insert(rng.randrange(len(lines)), " ".join(rng.choice(["Conta:", "xx", "(X)", "Outros:", "Data/Hora:"]) for _ in range(20)))
+    else:
+        return re.sub(r"(:)\s*[^:\n]{1,12}(?=\s|$)", r"\1", text, count=3)
+    return "\n".join(lines)
+
+
+def build_corpus(seed: int) -> List[str]:
+    rng = random.Random(seed)
+    base = _sample_texts() + _rendered_texts(rng)
+    return base + [_noisy(rng.choice(base), rng) for _ in range(200)]
+
+
+def _timeit(fn, corpus: List[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(corpus))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.seed)
+    mismatches = [text for text in corpus if legacy_parse(text) != parse_text_to_json(text)]
+    print(f"textos: {len(corpus)}   saídas diferentes: {len(mismatches)}")
+    for text in mismatches[:3]:
+        print("-" * 60)
+        print(text[:400])
+        print("anterior:", legacy_parse(text))
+        print("atual:   ", parse_text_to_json(text))
+
+    old = _timeit(legacy_parse, corpus, args.repeat)
+    new = _timeit(parse_text_to_json, corpus, args.repeat)
+    print(f"anterior: {old * 1e6:8.1f} µs/texto   atual: {new * 1e6:8.1f} µs/texto")
+
+    # textos malformados: rótulos repetidos sem valor, que fazem as regex preguiçosas retroceder
+    messy = {
+        "identificação": "IDENTIFICAÇÃO\n" + "Nome completo: " + "a " * 5000 + "Email:" * 2000
+        + "\nDESCRIÇÃO DO MOTIVO DA VIAGEM: x",
+        "destino": "DESTINO (Ida):\n" + "Local de Origem: a Local de Destino: b Data/Hora: sem data\n" * 60
+        + "DESTINO (Retorno): DATA/HORA DA MISSÃO:",
+    }
+    for label, text in messy.items():
+        for name, fn in (("anterior", legacy_parse), ("atual", parse_text_to_json)):
+            start = time.perf_counter()
+            fn(text)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"malformado/{label} ({len(text)} chars), {name}: {elapsed:8.1f} ms")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Mede o custo de render_docx_from_template para os dois templates.
+
+Uso (na raiz do repositório):
+    python benchmarks/bench_render.py [--repeat 30]
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.services.docx_render import render_docx_from_template  # noqa: E402
+from app.services.validate_anexo1 import validate_and_enrich_anexo1  # noqa: E402
+from app.services.validate_anexo2 import validate_and_enrich_anexo2  # noqa: E402
+
+TEMPLATES_DIR = ROOT / "app" / "templates"
+
+ANEXO1 = {
+    "tipo_solicitacao": "diarias_e_passagens",
+    "data_solicitacao": "2026-01-05",
+    "servidor": {
+        "nome_completo": "Maria da Silva",
+        "cargo_funcao": "Professora",
+        "cpf": "12345678901",
+        "rg": "1234567",
+        "data_nascimento": "1980-02-03",
+        "siape": "1234567",
+        "nome_mae": "Ana da Silva",
+        "endereco": "Rua A, 10 - Bananeiras/PB",
+        "telefone": "83999990000",
+        "email": "maria@ufpb.br",
+        "dados_bancarios": {"banco": "001", "agencia": "1234", "conta": "56789"},
+    },
+    "motivo_viagem": "Participação em congresso para apresentação de trabalho.",
+    "trechos": {"ida": [], "retorno": []},
+    "missao": {"inicio_data_hora": "2026-03-10T14:00:00", "termino_data_hora": "2026-03-12T12:00:00"},
+    "debito_recurso": {"tipo": "cchsa", "detalhe": ""},
+    "transporte": {"meios": ["veiculo_oficial"]},
+    "flags": {"envolve_fds_feriado_ou_dia_anterior": False, "fora_do_prazo": False},
+}
+
+ANEXO2 = {
+    "data_relatorio": "2026-03-13",
+    "proposto": {"nome": "Maria da Silva", "cpf": "12345678901", "siape": "1234567", "orgao": {"tipo": "cchsa"}},
+    "afastamento": {"ida": [], "retorno": []},
+    "viagem_realizada": "sim",
+    "atividades_desenvolvidas": "Apresentação do trabalho e participação nas sessões.",
+    "flags": {"prestacao_contas_fora_prazo": False},
+}
+
+
+def _with_trechos(payload: dict, key: str, n: int) -> dict:
+    p = copy.deepcopy(payload)
+    p[key] = {
+        "ida": [
+            {"origem": f"Origem {i}", "destino": f"Destino {i}", "data_hora": f"2026-03-10T08:{i % 60:02d}:00"}
+            for i in range(n)
+        ],
+        "retorno": [
+            {"origem": f"Destino {i}", "destino": f"Origem {i}", "data_hora": f"2026-03-12T18:{i % 60:02d}:00"}
+            for i in range(n)
+        ],
+    }
+    return p
+
+
+def _cases():
+    for n in (1, 5, 25):
+        yield f"anexo1 ({n} trecho(s))", "anexo1_template.docx", validate_and_enrich_anexo1(_with_trechos(ANEXO1, "trechos", n))
+        yield f"anexo2 ({n} trecho(s))", "anexo2_template.docx", validate_and_enrich_anexo2(_with_trechos(ANEXO2, "afastamento", n))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "out.docx"
+        for name, template, enriched in _cases():
+            assert enriched["ok"], enriched
+            template_path = TEMPLATES_DIR / template
+            # primeira chamada compila o template; não entra na média
+            start = time.perf_counter()
+            render_docx_from_template(template_path, out, enriched["placeholders"], rows=enriched["rows"])
+            first = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                render_docx_from_template(template_path, out, enriched["placeholders"], rows=enriched["rows"])
+            avg = (time.perf_counter() - start) / args.repeat
+            print(f"{name:<24} primeira: {first * 1000:7.1f} ms   média: {avg * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import copy
+import dataclasses
+import io
+import json
+import zipfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.services import drafts, executors, output_cache
+from app.services.drafts import FileDraftStore
+
+from test_validation import ANEXO1, ANEXO2
+
+MERGE_PATCH = {"content-type": "application/merge-patch+json"}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    test_settings = dataclasses.replace(
+        main.settings,
+        templates_dir=Path(__file__).resolve().parents[1] / "app" / "templates",
+        data_dir=tmp_path,
+    )
+    monkeypatch.setattr(main, "settings", test_settings)
+    monkeypatch.setattr(output_cache, "settings", test_settings)
+    monkeypatch.setattr(output_cache, "_cache", None)
+    monkeypatch.setattr(drafts, "_store", FileDraftStore(tmp_path / "drafts"))
+    # sem o lifespan: nada de LibreOffice, fila de jobs ou janitor
+    yield TestClient(main.app)
+    executors.shutdown_executors()
+
+
+def _new_draft(client):
+    r = client.post("/api/drafts", params={"kind": "anexo1"})
+    assert r.status_code == 200
+    assert r.headers["etag"] == '"v1"'
+    return r.json()["draft_id"]
+
+
+def test_merge_patch_with_if_match(client):
+    draft_id = _new_draft(client)
+    r = client.patch(f"/api/drafts/{draft_id}", json={"servidor": {"nome": "Maria", "cpf": "123"}}, headers=MERGE_PATCH)
+    assert r.json() == {"ok": True, "version": 2}
+
+    r = client.patch(
+        f"/api/drafts/{draft_id}",
+        json={"servidor": {"cpf": None, "rg": "9"}},
+        headers={**MERGE_PATCH, "if-match": '"v2"'},
+    )
+    assert r.status_code == 200
+    assert r.headers["etag"] == '"v3"'
+
+    r = client.get(f"/api/drafts/{draft_id}")
+    assert r.headers["etag"] == '"v3"'
+    assert r.json()["data"] == {"servidor": {"nome": "Maria", "rg": "9"}}
+
+
+def test_stale_if_match_is_a_conflict(client):
+    draft_id = _new_draft(client)
+    client.patch(f"/api/drafts/{draft_id}", json={"motivo_viagem": "A"}, headers={"if-match": '"v1"'})
+
+    r = client.patch(f"/api/drafts/{draft_id}", json={"motivo_viagem": "B"}, headers={"if-match": '"v1"'})
+    assert r.status_code == 409
+    assert r.headers["etag"] == '"v2"'
+    assert client.get(f"/api/drafts/{draft_id}").json()["data"] == {"motivo_viagem": "A"}
+
+
+def test_plain_json_patch_replaces_whole_sections(client):
+    draft_id = _new_draft(client)
+    client.patch(f"/api/drafts/{draft_id}", json={"servidor": {"nome": "Maria", "cpf": "123"}})
+    client.patch(f"/api/drafts/{draft_id}", json={"servidor": {"rg": "9"}})
+    assert client.get(f"/api/drafts/{draft_id}").json()["data"] == {"servidor": {"rg": "9"}}
+
+
+@pytest.mark.parametrize("header", ['"abc"', '"1"', '"v"'])
+def test_invalid_if_match(client, header):
+    draft_id = _new_draft(client)
+    r = client.patch(f"/api/drafts/{draft_id}", json={}, headers={"if-match": header})
+    assert r.status_code == 400
+
+
+def test_unknown_draft(client):
+    assert client.get("/api/drafts/00000000-0000-0000-0000-000000000000").status_code == 404
+    assert client.get("/api/drafts/..%2F..%2Fetc").status_code == 404
+    r = client.patch("/api/drafts/00000000-0000-0000-0000-000000000000", json={})
+    assert r.status_code == 404
+
+
+def test_generate_docx_is_served_from_the_cache(client, tmp_path):
+    r = client.post("/api/anexo1/generate", params={"format": "docx"}, json=copy.deepcopy(ANEXO1))
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+
+    again = client.post("/api/anexo1/generate", params={"format": "docx"}, json=copy.deepcopy(ANEXO1))
+    assert again.headers["etag"] == etag
+    assert again.content == r.content
+
+    # POST não é condicional: If-None-Match não vira 304
+    r = client.post("/api/anexo1/generate", params={"format": "docx"}, json=copy.deepcopy(ANEXO1), headers={"if-none-match": etag})
+    assert r.status_code == 200
+    assert r.content == again.content
+    # os links de envio são removidos depois da resposta
+    key = etag.strip('"').removesuffix("-docx")
+    assert [p.name for p in (tmp_path / "cache").iterdir()] == [f"{key}.docx"]
+
+
+def test_batch_reports_invalid_items(client):
+    invalid = copy.deepcopy(ANEXO2)
+    del invalid["proposto"]
+    r = client.post("/api/anexo2/batch", params={"format": "docx"}, json=[copy.deepcopy(ANEXO2), invalid, copy.deepcopy(ANEXO2)])
+    assert r.status_code == 200
+
+    with zipfile.ZipFile(io.BytesIO(r.content)) as zf:
+        names = zf.namelist()
+        report = json.loads(zf.read("relatorio.json"))
+    assert names == ["anexo2_001.docx", "anexo2_003.docx", "relatorio.json"]
+    assert [item["ok"] for item in report] == [True, False, True]
+    assert report[1]["errors"]
+
+
+def test_batch_limits(client, monkeypatch):
+    assert client.post("/api/anexo1/batch", json=[]).status_code == 400
+    monkeypatch.setattr(main, "settings", dataclasses.replace(main.settings, batch_max_items=2))
+    assert client.post("/api/anexo1/batch", json=[{}, {}, {}]).status_code == 413
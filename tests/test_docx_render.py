@@ -0,0 +1,58 @@
+import copy
+import zipfile
+from pathlib import Path
+
+import docx
+import pytest
+
+from app.services.docx_render import render_docx_from_template
+from app.services.docx_xml_render import render_docx_xml
+from app.services.validate_anexo1 import validate_and_enrich_anexo1
+from app.services.validate_anexo2 import validate_and_enrich_anexo2
+
+from test_validation import ANEXO1, ANEXO2
+
+TEMPLATES = Path(__file__).resolve().parents[1] / "app" / "templates"
+
+
+def _raw(data, info):
+    start = info.header_offset + 30 + len(info.filename) + len(info.extra)
+    return data[start:start + info.compress_size]
+
+
+def _text(path):
+    document = docx.Document(str(path))
+    parts = [p.text for p in document.paragraphs]
+    for table in document.tables:
+        for row in table.rows:
+            parts.extend(cell.text for cell in row.cells)
+    return parts
+
+
+@pytest.mark.parametrize("kind, validate, payload", [
+    ("anexo1", validate_and_enrich_anexo1, ANEXO1),
+    ("anexo2", validate_and_enrich_anexo2, ANEXO2),
+])
+def test_xml_renderer_output_opens_and_matches_python_docx(tmp_path, kind, validate, payload):
+    enriched = validate(copy.deepcopy(payload))
+    assert enriched["ok"], enriched
+    template = TEMPLATES / f"{kind}_template.docx"
+
+    render_docx_from_template(template, tmp_path / "ref.docx", enriched["placeholders"], enriched.get("rows"))
+    render_docx_xml(template, tmp_path / "xml.docx", enriched["placeholders"], enriched.get("rows"))
+
+    with zipfile.ZipFile(tmp_path / "xml.docx") as zf:
+        assert zf.testzip() is None
+        with zipfile.ZipFile(template) as tz:
+            assert zf.namelist() == tz.namelist()
+            # só o document.xml muda; as outras partes são copiadas sem recompressão
+            out_raw, tmpl_raw = (tmp_path / "xml.docx").read_bytes(), template.read_bytes()
+            for info in tz.infolist():
+                if info.filename != "word/document.xml":
+                    copied = zf.getinfo(info.filename)
+                    assert (copied.CRC, copied.compress_size) == (info.CRC, info.compress_size)
+                    assert _raw(out_raw, copied) == _raw(tmpl_raw, info)
+    text = _text(tmp_path / "xml.docx")
+    assert text == _text(tmp_path / "ref.docx")
+    assert any("Maria da Silva" in t for t in text)
+    assert not any("{{" in t for t in text)
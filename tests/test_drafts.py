@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+import pytest
+
+from app.services.drafts import (
+    CachedDraftStore,
+    DraftNotFoundError,
+    FileDraftStore,
+    SQLiteDraftStore,
+    merge_patch,
+    migrate_flat_drafts,
+)
+
+DAY = 86400
+
+
+def _age(path, days):
+    ts = time.time() - days * DAY
+    os.utime(path, (ts, ts))
+
+
+def _flat_draft(root, days_old):
+    draft_id = str(uuid.uuid4())
+    path = root / f"{draft_id}.json"
+    path.write_text(json.dumps({"kind": "anexo1", "data": {}}), encoding="utf-8")
+    _age(path, days_old)
+    return draft_id
+
+
+def _cutoff(retention_days=15):
+    return time.time() - retention_days * DAY
+
+
+def test_purge_removes_expired_and_keeps_recent(tmp_path):
+    store = FileDraftStore(tmp_path)
+    old, new = str(uuid.uuid4()), str(uuid.uuid4())
+    store.save(old, {"data": {}})
+    store.save(new, {"data": {}})
+    # marcador e arquivo de 40 dias atrás, como se o rascunho tivesse sido gravado lá
+    _age(store._path(old), 40)
+    store.index.add(old, time.time() - 40 * DAY)
+
+    store.purge(_cutoff())
+
+    assert not store._path(old).exists()
+    assert store.load(new) == {"data": {}}
+
+
+def test_purge_keeps_draft_saved_again_after_old_marker(tmp_path):
+    store = FileDraftStore(tmp_path)
+    draft_id = str(uuid.uuid4())
+    store.index.add(draft_id, time.time() - 40 * DAY)
+    store.save(draft_id, {"data": {"a": 1}})
+
+    store.purge(_cutoff())
+
+    assert store.load(draft_id) == {"data": {"a": 1}}
+
+
+def test_migrated_drafts_expire_without_backfill(tmp_path):
+    old = [_flat_draft(tmp_path, 40) for _ in range(3)]
+    recent = _flat_draft(tmp_path, 1)
+
+    assert migrate_flat_drafts(tmp_path) == 4
+    FileDraftStore(tmp_path).purge(_cutoff())
+
+    store = FileDraftStore(tmp_path)
+    for draft_id in old:
+        with pytest.raises(DraftNotFoundError):
+            store.load(draft_id)
+    assert store.load(recent)["kind"] == "anexo1"
+
+
+def test_lazily_adopted_flat_draft_is_indexed(tmp_path):
+    draft_id = _flat_draft(tmp_path, 40)
+    store = FileDraftStore(tmp_path)
+    store.load(draft_id)  # move para o shard
+
+    store.purge(_cutoff())
+
+    with pytest.raises(DraftNotFoundError):
+        store.load(draft_id)
+
+
+def test_purge_respects_limit(tmp_path):
+    store = FileDraftStore(tmp_path)
+    for _ in range(5):
+        draft_id = str(uuid.uuid4())
+        store.save(draft_id, {})
+        _age(store._path(draft_id), 40)
+        store.index.add(draft_id, time.time() - 40 * DAY)
+
+    assert store.purge(_cutoff(), limit=2) == 2
+    total = 2
+    while True:
+        processed = store.purge(_cutoff(), limit=2)
+        total += processed
+        if processed < 2:
+            break
+    # cada rascunho tem dois marcadores (hoje, pelo save, e 40 dias atrás); só os vencidos contam
+    assert total == 5
+    assert store.purge(_cutoff()) == 0
+
+
+def _file_store(root):
+    return FileDraftStore(root)
+
+
+def _sqlite_store(root):
+    return SQLiteDraftStore(root / "drafts.sqlite3", pool_size=4)
+
+
+@pytest.fixture(params=["file", "sqlite", "cached-file", "cached-sqlite"])
+def store_factory(request, tmp_path):
+    """Fábrica de stores sobre o mesmo armazenamento, como workers diferentes do uvicorn."""
+    backend = request.param.removeprefix("cached-")
+    make = _file_store if backend == "file" else _sqlite_store
+    created = []
+
+    def factory():
+        store = make(tmp_path)
+        created.append(store)
+        if request.param.startswith("cached-"):
+            store = CachedDraftStore(store, 1024 * 1024)
+        return store
+
+    yield factory
+    for store in created:
+        if isinstance(store, SQLiteDraftStore):
+            store.close()
+
+
+def test_missing_draft(store_factory):
+    store = store_factory()
+    with pytest.raises(DraftNotFoundError):
+        store.load(str(uuid.uuid4()))
+    with pytest.raises(DraftNotFoundError):
+        store.update(str(uuid.uuid4()), lambda d: d)
+
+
+def test_concurrent_updates_are_not_lost(store_factory):
+    stores = [store_factory(), store_factory()]
+    draft_id = str(uuid.uuid4())
+    stores[0].save(draft_id, {"n": 0, "seen": []})
+
+    def increment(draft):
+        return {"n": draft["n"] + 1, "seen": draft["seen"] + [draft["n"]]}
+
+    def run(store):
+        for _ in range(25):
+            store.update(draft_id, increment)
+
+    threads = [threading.Thread(target=run, args=(stores[i % 2],)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    draft = stores[1].load(draft_id)
+    assert draft["n"] == 200
+    assert draft["seen"] == list(range(200))
+
+
+def test_reader_sees_writes_from_another_worker(store_factory):
+    reader, writer = store_factory(), store_factory()
+    draft_id = str(uuid.uuid4())
+    writer.save(draft_id, {"data": {"nome": "Maria"}})
+    assert reader.load(draft_id) == {"data": {"nome": "Maria"}}
+
+    writer.update(draft_id, lambda d: {"data": {**d["data"], "cargo": "Professora"}})
+    assert reader.load(draft_id) == {"data": {"nome": "Maria", "cargo": "Professora"}}
+
+    writer.purge(time.time() + 2 * DAY)
+    with pytest.raises(DraftNotFoundError):
+        reader.load(draft_id)
+
+
+def test_cache_counts_hits_and_stale_entries(tmp_path):
+    inner = FileDraftStore(tmp_path)
+    cached = CachedDraftStore(inner, 1024 * 1024)
+    draft_id = str(uuid.uuid4())
+    cached.save(draft_id, {"v": 1})
+
+    cached.load(draft_id)
+    inner.save(draft_id, {"v": 22})
+    assert cached.load(draft_id) == {"v": 22}
+
+    stats = cached.stats()
+    assert (stats["hits"], stats["stale"], stats["misses"]) == (1, 1, 1)
+    assert stats["entries"] == 1
+
+
+def test_cache_respects_byte_limit(tmp_path):
+    cached = CachedDraftStore(FileDraftStore(tmp_path), 100)
+    ids = [str(uuid.uuid4()) for _ in range(5)]
+    for draft_id in ids:
+        cached.save(draft_id, {"texto": "x" * 30})
+
+    assert cached.stats()["bytes"] <= 100
+    assert cached.stats()["entries"] == 2
+    # os despejados continuam no store de baixo
+    assert cached.load(ids[0]) == {"texto": "x" * 30}
+
+
+def test_merge_patch():
+    target = {"servidor": {"nome": "Maria", "cpf": "123"}, "trechos": [1, 2], "flags": {"a": True}}
+    patch = {"servidor": {"cpf": None, "rg": "9"}, "trechos": [3], "flags": None, "novo": {"x": None}}
+
+    assert merge_patch(target, patch) == {
+        "servidor": {"nome": "Maria", "rg": "9"},
+        "trechos": [3],
+        "novo": {},
+    }
+    assert target["servidor"] == {"nome": "Maria", "cpf": "123"}
+    assert merge_patch(target, [1]) == [1]
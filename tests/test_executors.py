@@ -0,0 +1,119 @@
+import asyncio
+import dataclasses
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import executors
+from app.services.executors import ParseLimitExceeded, run_in_parse_pool
+
+
+def _pid_after(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def _burn_cpu(marker):
+    # conta quantas vezes a tarefa começou (não deve haver nova tentativa)
+    with open(marker, "a") as fh:
+        fh.write("x")
+    while True:
+        pass
+
+
+def _allocate(mb):
+    return len(bytearray(mb * 1024 * 1024))
+
+
+def _fail():
+    raise ValueError("arquivo ilegível")
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(executors, "settings", dataclasses.replace(
+        executors.settings,
+        parse_workers=2,
+        parse_cpu_limit_s=1,
+        parse_memory_limit_mb=512,
+        parse_max_tasks_per_child=0,
+    ))
+    monkeypatch.setattr(executors, "_parse_pool", None)
+    executors.warm_up_parse_pool()
+    yield executors.get_parse_pool()
+    executors.shutdown_executors()
+
+
+def test_cpu_limit_fails_once_without_retry(pool, tmp_path):
+    marker = tmp_path / "starts"
+
+    async def main():
+        with pytest.raises(ParseLimitExceeded):
+            await run_in_parse_pool(_burn_cpu, str(marker))
+        # o processo foi recriado: o pool continua atendendo
+        return await run_in_parse_pool(_pid_after, 0)
+
+    assert isinstance(asyncio.run(main()), int)
+    assert marker.read_text() == "x"
+
+
+def test_memory_limit_is_reported_as_limit(pool):
+    async def main():
+        with pytest.raises(ParseLimitExceeded):
+            await run_in_parse_pool(_allocate, 2048)
+        return await run_in_parse_pool(_allocate, 1)
+
+    assert asyncio.run(main()) == 1024 * 1024
+
+
+def test_parser_errors_propagate_and_keep_the_process(pool):
+    pids = {w.proc.pid for w in pool._workers}
+
+    async def main():
+        for _ in range(3):
+            with pytest.raises(ValueError, match="ilegível"):
+                await run_in_parse_pool(_fail)
+        await asyncio.sleep(0.1)  # devolução ao pool roda depois da resposta
+
+    asyncio.run(main())
+    assert {w.proc.pid for w in pool._workers} == pids
+
+
+def test_timeout_kills_only_its_own_process(pool):
+    async def main():
+        other = asyncio.ensure_future(run_in_parse_pool(_pid_after, 1.5))
+        await asyncio.sleep(0.2)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(run_in_parse_pool(_pid_after, 30), timeout=0.5)
+        return await other
+
+    assert isinstance(asyncio.run(main()), int)
+
+
+def test_more_parses_than_threads_do_not_deadlock(pool):
+    async def main():
+        # executor padrão menor que a fila: a espera por processo não pode ocupá-lo
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=2))
+        pids = await asyncio.wait_for(
+            asyncio.gather(*(run_in_parse_pool(_pid_after, 0.05) for _ in range(12))),
+            timeout=20,
+        )
+        return pids, await run_in_parse_pool(_pid_after, 0)
+
+    pids, last = asyncio.run(main())
+    assert len(set(pids)) == 2
+    assert last in pids
+
+
+def test_cancelled_waiter_does_not_lose_a_process(pool):
+    async def main():
+        busy = [asyncio.ensure_future(run_in_parse_pool(_pid_after, 0.3)) for _ in range(2)]
+        await asyncio.sleep(0.1)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(run_in_parse_pool(_pid_after, 0), timeout=0.05)
+        await asyncio.gather(*busy)
+        return await asyncio.gather(*(run_in_parse_pool(_pid_after, 0.1) for _ in range(2)))
+
+    assert len(set(asyncio.run(main()))) == 2
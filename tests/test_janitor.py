@@ -0,0 +1,92 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from app.services import janitor as janitor_module
+from app.services import metrics
+from app.services.drafts import FileDraftStore
+from app.services.janitor import Janitor
+from app.services.jobs import JobQueue
+
+DAY = 86400
+
+
+async def _noop(kind, format, payload, dest):
+    pass
+
+
+def _job(root, job_id, status, days_old):
+    job_dir = root / job_id
+    job_dir.mkdir(parents=True)
+    raw = {"id": job_id, "kind": "anexo1", "format": "pdf", "status": status, "updated_at": time.time() - days_old * DAY}
+    (job_dir / "job.json").write_text(json.dumps(raw), encoding="utf-8")
+    return job_dir
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = FileDraftStore(tmp_path / "drafts")
+    monkeypatch.setattr(janitor_module, "get_draft_store", lambda: store)
+    return store
+
+
+def _janitor(tmp_path, **kwargs):
+    return Janitor(tmp_path / ".janitor.lock", 3600, 15 * DAY, 100, 0, **kwargs)
+
+
+def test_sweep_purges_finished_jobs(tmp_path, store):
+    jobs = JobQueue(tmp_path / "jobs", 1, 10, _noop)
+    old_done = _job(jobs.root, "a", "done", 20)
+    old_failed = _job(jobs.root, "b", "failed", 20)
+    old_running = _job(jobs.root, "c", "running", 20)
+    recent = _job(jobs.root, "d", "done", 1)
+
+    asyncio.run(_janitor(tmp_path, jobs=jobs, jobs_retention_s=15 * DAY).sweep())
+
+    assert not old_done.exists()
+    assert not old_failed.exists()
+    assert old_running.exists()
+    assert recent.exists()
+
+
+def test_sweep_skips_jobs_when_another_worker_holds_the_lock(tmp_path, store):
+    jobs = JobQueue(tmp_path / "jobs", 1, 10, _noop)
+    old = _job(jobs.root, "a", "done", 20)
+    holder = _janitor(tmp_path)
+    fd = holder._try_lock()
+
+    try:
+        asyncio.run(_janitor(tmp_path, jobs=jobs, jobs_retention_s=15 * DAY).sweep())
+    finally:
+        os.close(fd)
+
+    assert old.exists()
+
+
+def test_only_the_lock_holder_walks_data_dir(tmp_path, store, monkeypatch):
+    data_dir = tmp_path / "data"
+    (data_dir / "cache").mkdir(parents=True)
+    (data_dir / "cache" / "a.pdf").write_bytes(b"x" * 100)
+    walks = []
+    measure = metrics.measure_dir
+    monkeypatch.setattr(metrics, "measure_dir", lambda root: walks.append(root) or measure(root))
+
+    holder = _janitor(tmp_path)
+    fd = holder._try_lock()
+    try:
+        asyncio.run(_janitor(tmp_path, data_dir=data_dir).sweep())
+    finally:
+        os.close(fd)
+    assert walks == []
+
+    asyncio.run(_janitor(tmp_path, data_dir=data_dir).sweep())
+    assert walks == [data_dir]
+
+    # outro worker só lê a medição gravada
+    metrics.DATA_DIR_BYTES.set(0)
+    metrics.load_data_dir_size(data_dir / ".data-dir-size.json")
+    assert metrics.DATA_DIR_BYTES._values[()] == 100
+    assert walks == [data_dir]
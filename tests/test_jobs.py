@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.jobs import JobQueue, QueueFullError
+
+
+async def _write_kind(kind, format, payload, dest):
+    dest.write_text(f"{kind}:{payload['n']}", encoding="utf-8")
+
+
+async def _fail(kind, format, payload, dest):
+    raise HTTPException(422, "Dados inválidos no item.")
+
+
+async def _wait(queue, job_id):
+    for _ in range(200):
+        job = queue.get(job_id)
+        if job.status in ("done", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job não terminou")
+
+
+def test_job_runs_and_result_is_visible_to_other_instances(tmp_path):
+    async def main():
+        queue = JobQueue(tmp_path, 2, 10, _write_kind)
+        await queue.start()
+        try:
+            job = queue.submit("anexo1", "docx", {"n": 7})
+            assert job.status == "queued"
+            return await _wait(queue, job.id)
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(main())
+    assert job.status == "done"
+    other = JobQueue(tmp_path, 1, 10, _write_kind)
+    assert other.result_path(other.get(job.id)).read_text(encoding="utf-8") == "anexo1:7"
+    assert "payload" not in other.get(job.id).public()
+
+
+def test_failed_job_keeps_the_error_detail(tmp_path):
+    async def main():
+        queue = JobQueue(tmp_path, 1, 10, _fail)
+        await queue.start()
+        try:
+            return await _wait(queue, queue.submit("anexo2", "pdf", {}).id)
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(main())
+    assert job.status == "failed"
+    assert job.error == "Dados inválidos no item."
+
+
+def test_queue_full(tmp_path):
+    async def main():
+        # sem start(): nada consome a fila
+        queue = JobQueue(tmp_path, 1, 2, _write_kind)
+        queue.root.mkdir(parents=True, exist_ok=True)
+        queue.submit("anexo1", "docx", {"n": 1})
+        queue.submit("anexo1", "docx", {"n": 2})
+        with pytest.raises(QueueFullError):
+            queue.submit("anexo1", "docx", {"n": 3})
+        await queue.stop()
+
+    asyncio.run(main())
+
+
+def test_interrupted_job_is_resumed_on_start(tmp_path):
+    job_dir = tmp_path / ("a" * 32)
+    job_dir.mkdir()
+    raw = {"id": "a" * 32, "kind": "anexo1", "format": "docx", "status": "running", "payload": {"n": 3}}
+    (job_dir / "job.json").write_text(json.dumps(raw), encoding="utf-8")
+
+    async def main():
+        queue = JobQueue(tmp_path, 1, 10, _write_kind)
+        await queue.start()
+        try:
+            return await _wait(queue, "a" * 32)
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(main())
+    assert job.status == "done"
+    assert (job_dir / job.filename).read_text(encoding="utf-8") == "anexo1:3"
+
+
+def test_worker_survives_a_failed_status_write(tmp_path, monkeypatch):
+    async def main():
+        queue = JobQueue(tmp_path, 1, 10, _write_kind)
+        queue.root.mkdir(parents=True, exist_ok=True)
+        first = queue.submit("anexo1", "docx", {"n": 1})
+        second = queue.submit("anexo1", "docx", {"n": 2})
+        write = queue._write
+
+        def flaky_write(job, payload=None):
+            if job.id == first.id and job.status == "running":
+                raise OSError(28, "No space left on device")
+            write(job, payload)
+
+        monkeypatch.setattr(queue, "_write", flaky_write)
+        await queue.start()
+        try:
+            return await _wait(queue, first.id), await _wait(queue, second.id)
+        finally:
+            await queue.stop()
+
+    first, second = asyncio.run(main())
+    assert first.status == "failed"
+    assert second.status == "done"
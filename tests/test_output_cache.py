@@ -0,0 +1,71 @@
+import os
+import time
+
+from app.services.output_cache import OutputCache
+
+
+def _src(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(os.urandom(size))
+    return path
+
+
+def test_get_returns_private_link_that_survives_eviction(tmp_path):
+    root = tmp_path / "cache"
+    cache = OutputCache(root, max_bytes=1500)
+    src = _src(tmp_path, "a", 1000)
+    os.unlink(cache.put("a", "pdf", src))
+
+    served = cache.get("a", "pdf")
+    # outro put despeja "a" antes de o FileResponse abrir o arquivo
+    os.unlink(cache.put("b", "pdf", _src(tmp_path, "b", 1000)))
+
+    assert not (root / "a.pdf").exists()
+    assert served.read_bytes() == src.read_bytes()
+    served.unlink()
+    assert cache.get("a", "pdf") is None
+
+
+def test_put_link_survives_eviction_by_another_worker(tmp_path):
+    root = tmp_path / "cache"
+    mine, other = OutputCache(root, max_bytes=1500), OutputCache(root, max_bytes=1500)
+    other.get("x", "pdf")  # índice do outro worker carregado antes do put
+    src = _src(tmp_path, "a", 1000)
+
+    served = mine.put("a", "pdf", src)
+    other._entries["a.pdf"] = 1000
+    other._total += 1000
+    os.unlink(other.put("b", "pdf", _src(tmp_path, "b", 1000)))
+
+    assert not (root / "a.pdf").exists()
+    assert served.read_bytes() == src.read_bytes()
+
+
+def test_entry_removed_elsewhere_is_a_miss(tmp_path):
+    root = tmp_path / "cache"
+    cache = OutputCache(root, max_bytes=10_000)
+    assert cache.put("a", "pdf", _src(tmp_path, "a", 10), link=False) is None
+    (root / "a.pdf").unlink()
+
+    assert cache.get("a", "pdf") is None
+    assert cache._total == 0
+
+
+def test_links_are_not_indexed_and_stale_ones_are_removed(tmp_path):
+    root = tmp_path / "cache"
+    cache = OutputCache(root, max_bytes=10_000)
+    fresh = cache.put("a", "docx", _src(tmp_path, "a", 10))
+    # link esquecido por um worker que morreu há duas horas
+    stale = root / f".serve-{int(time.time()) - 2 * 3600}-dead.docx"
+    os.link(root / "a.docx", stale)
+    # entrada sem acesso há horas: o link recente não pode ser tomado por órfão
+    old = time.time() - 5 * 3600
+    os.utime(fresh, (old, old))
+
+    reloaded = OutputCache(root, max_bytes=10_000)
+    assert reloaded.get("b", "docx") is None
+
+    assert list(reloaded._entries) == ["a.docx"]
+    assert reloaded._total == 10
+    assert fresh.exists()
+    assert not stale.exists()
@@ -0,0 +1,27 @@
+from app.services import parse_cache
+from app.services.parse_cache import ParseCache
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(parse_cache.time, "monotonic", lambda: now[0])
+    cache = ParseCache(max_entries=10, ttl_s=60)
+    cache.put("pdf:abc", {"nome": "Maria"})
+
+    now[0] += 59
+    assert cache.get("pdf:abc") == {"nome": "Maria"}
+    now[0] += 2
+    assert cache.get("pdf:abc") is None
+    assert "pdf:abc" not in cache._entries
+
+
+def test_least_recently_used_is_evicted():
+    cache = ParseCache(max_entries=2, ttl_s=60)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    cache.get("a")
+    cache.put("c", {"n": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1}
+    assert cache.get("c") == {"n": 3}
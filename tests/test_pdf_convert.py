@@ -0,0 +1,134 @@
+import asyncio
+import dataclasses
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import pdf_convert
+from app.services.pdf_convert import _Worker, convert_to_pdf_async
+
+# lançador que deixa um filho (o "soffice.bin") e espera por ele
+FAKE_SOFFICE = """#!/bin/sh
+sleep 300 &
+echo $! > "$SOFFICE_CHILD"
+wait
+"""
+
+# conversor: grava o PDF vazio de cada arquivo em --outdir
+FAKE_CONVERTER = """#!/bin/sh
+while [ $# -gt 0 ]; do
+  case "$1" in --outdir) out="$2"; shift;; *) src="$1";; esac
+  shift
+done
+sleep 0.05
+name=$(basename "$src")
+: > "$out/${name%.*}.pdf"
+"""
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # filho já morto, ainda não recolhido pelo init (ou recolhido neste meio-tempo)
+    try:
+        with open(f"/proc/{pid}/stat") as fh:
+            return fh.read().split(") ")[1][0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def _install(tmp_path, monkeypatch, body):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "soffice"
+    script.write_text(body)
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+
+@pytest.fixture
+def fake_soffice(tmp_path, monkeypatch):
+    _install(tmp_path, monkeypatch, FAKE_SOFFICE)
+    child = tmp_path / "child.pid"
+    monkeypatch.setenv("SOFFICE_CHILD", str(child))
+    return child
+
+
+@pytest.fixture
+def converter(tmp_path, monkeypatch):
+    _install(tmp_path, monkeypatch, FAKE_CONVERTER)
+    monkeypatch.setattr(pdf_convert, "settings", dataclasses.replace(
+        pdf_convert.settings,
+        pdf_max_parallel=2,
+        pdf_resident_instances=False,
+        pdf_pool_acquire_timeout_s=20.0,
+        pdf_profiles_dir=tmp_path / "profiles",
+    ))
+    monkeypatch.setattr(pdf_convert, "_pool", None)
+    yield
+    pdf_convert.shutdown_pool()
+
+
+def _child_pid(child):
+    for _ in range(100):
+        if child.exists() and child.read_text().strip():
+            return int(child.read_text())
+        time.sleep(0.05)
+    raise AssertionError("o lançador não iniciou o filho")
+
+
+def test_recycle_kills_the_whole_instance(tmp_path, fake_soffice):
+    worker = _Worker(0, tmp_path / "profile", resident=True)
+    worker.start()
+    first = _child_pid(fake_soffice)
+    fake_soffice.unlink()
+
+    worker.restart()
+    second = _child_pid(fake_soffice)
+    assert not _alive(first)
+
+    worker.stop()
+    assert not _alive(second)
+
+
+def test_waiting_conversions_do_not_hold_executor_threads(tmp_path, converter):
+    sources = []
+    for i in range(10):
+        src = tmp_path / f"doc{i}.docx"
+        src.write_bytes(b"")
+        sources.append(src)
+
+    async def main():
+        # executor padrão menor que a fila de conversões
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=1))
+        return await asyncio.wait_for(
+            asyncio.gather(*(convert_to_pdf_async(src, tmp_path) for src in sources)),
+            timeout=20,
+        )
+
+    pdfs = asyncio.run(main())
+    assert [p.name for p in pdfs] == [f"doc{i}.pdf" for i in range(10)]
+    assert len(pdf_convert.get_pool()._idle) == 2
+
+
+def test_acquire_timeout_and_cancellation_keep_the_slots(tmp_path, converter):
+    pool = pdf_convert.get_pool()
+
+    async def main():
+        held = [await pool.acquire_async(1), await pool.acquire_async(1)]
+        with pytest.raises(RuntimeError, match="Nenhum conversor"):
+            await pool.acquire_async(0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.acquire_async(10), timeout=0.05)
+        for worker in held:
+            pool.release(worker)
+        return await pool.acquire_async(1)
+
+    asyncio.run(main())
+    # o síncrono (usado pelos processos de leitura) divide a mesma fila
+    assert pool.acquire(1) in pool._workers
+    assert len(pool._idle) == 0
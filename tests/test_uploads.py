@@ -0,0 +1,139 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.services import uploads
+from app.services.uploads import UploadFormatError, UploadTooLargeError, receive_upload
+
+MAX_BYTES = 256 * 1024
+PDF = b"%PDF-1.4\n" + b"x" * 5000 + b"\n%%EOF"
+
+
+async def _endpoint(request):
+    try:
+        upload = await receive_upload(request, "file", (".pdf", ".docx", ".doc"), MAX_BYTES)
+    except UploadTooLargeError as exc:
+        return JSONResponse({"error": str(exc)}, status_code=413)
+    except UploadFormatError as exc:
+        return JSONResponse({"error": str(exc)}, status_code=400)
+    body = upload.path.read_bytes()
+    upload.path.unlink()
+    return JSONResponse({
+        "filename": upload.filename,
+        "suffix": upload.suffix,
+        "digest": upload.digest,
+        "size": upload.size,
+        "sha256": hashlib.sha256(body).hexdigest(),
+        "same": body == PDF,
+    })
+
+
+@pytest.fixture
+def client():
+    return TestClient(Starlette(routes=[Route("/upload", _endpoint, methods=["POST"])]))
+
+
+@pytest.fixture
+def temp_files(monkeypatch):
+    created = []
+    original = uploads.NamedTemporaryFile
+
+    def _tracking(*args, **kwargs):
+        fh = original(*args, **kwargs)
+        created.append(Path(fh.name))
+        return fh
+
+    monkeypatch.setattr(uploads, "NamedTemporaryFile", _tracking)
+    return created
+
+
+def _multipart(filename, content, boundary="b0undary", extra=b""):
+    return (
+        extra
+        + f"--{boundary}\r\n".encode()
+        + f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'.encode()
+        + b"Content-Type: application/octet-stream\r\n\r\n"
+        + content
+        + f"\r\n--{boundary}--\r\n".encode()
+    )
+
+
+def _headers(boundary="b0undary"):
+    return {"content-type": f"multipart/form-data; boundary={boundary}"}
+
+
+def test_valid_upload_is_written_once_with_hash(client, temp_files):
+    r = client.post("/upload", files={"file": ("Anexo I.PDF", PDF, "application/pdf")})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["filename"] == "Anexo I.PDF"
+    assert body["suffix"] == ".pdf"
+    assert body["size"] == len(PDF)
+    assert body["digest"] == body["sha256"] == hashlib.sha256(PDF).hexdigest()
+    assert body["same"]
+    assert len(temp_files) == 1
+
+
+def test_body_split_in_small_chunks(client):
+    data = _multipart("a.pdf", PDF)
+    chunks = (data[i:i + 7] for i in range(0, len(data), 7))
+    r = client.post("/upload", content=chunks, headers=_headers())
+    assert r.status_code == 200
+    assert r.json()["same"]
+
+
+def test_wrong_magic_rejected_before_any_write(client, temp_files):
+    r = client.post("/upload", files={"file": ("a.pdf", b"PK\x03\x04" + b"0" * 4000, "application/pdf")})
+    assert r.status_code == 400
+    assert temp_files == []
+
+
+def test_unsupported_extension(client, temp_files):
+    r = client.post("/upload", files={"file": ("a.txt", PDF, "text/plain")})
+    assert r.status_code == 400
+    assert "Formato não suportado" in r.json()["error"]
+    assert temp_files == []
+
+
+def test_empty_file(client, temp_files):
+    r = client.post("/upload", files={"file": ("a.pdf", b"", "application/pdf")})
+    assert r.status_code == 400
+    assert "vazio" in r.json()["error"]
+    assert temp_files == []
+
+
+def test_missing_file_field(client):
+    r = client.post("/upload", files={"other": ("a.pdf", PDF, "application/pdf")})
+    assert r.status_code == 400
+
+
+def test_not_multipart(client):
+    r = client.post("/upload", content=PDF, headers={"content-type": "application/pdf"})
+    assert r.status_code == 400
+
+
+def test_chunked_upload_over_limit_is_cut(client, temp_files):
+    def body():
+        for part in (
+            b'--b0undary\r\nContent-Disposition: form-data; name="file"; filename="a.pdf"\r\n\r\n%PDF-1.4\n',
+            *([b"y" * 64 * 1024] * 16),
+            b"\r\n--b0undary--\r\n",
+        ):
+            yield part
+
+    # gerador sem Content-Length: o httpx envia em chunked
+    r = client.post("/upload", content=body(), headers=_headers())
+    assert r.status_code == 413
+    assert all(not p.exists() for p in temp_files)
+
+
+def test_limit_counts_other_form_fields(client, temp_files):
+    noise = b'--b0undary\r\nContent-Disposition: form-data; name="x"\r\n\r\n' + b"z" * (MAX_BYTES + 128 * 1024) + b"\r\n"
+    r = client.post("/upload", content=_multipart("a.pdf", PDF, extra=noise), headers=_headers())
+    assert r.status_code == 413
+    assert temp_files == []
@@ -0,0 +1,147 @@
+import copy
+
+import pytest
+
+from app.services.schemas import schema_errors
+from app.services.validate_anexo1 import validate_and_enrich_anexo1
+from app.services.validate_anexo2 import validate_and_enrich_anexo2
+
+ANEXO1 = {
+    "tipo_solicitacao": "diarias",
+    "data_solicitacao": "2030-01-02",
+    "servidor": {
+        "nome_completo": "Maria da Silva",
+        "cargo_funcao": "Professora",
+        "cpf": "12345678909",
+        "rg": "1234567",
+        "data_nascimento": "1980-05-10",
+        "siape": "1234567",
+        "nome_mae": "Ana da Silva",
+        "endereco": "Rua das Flores, 100",
+        "telefone": "83999999999",
+        "email": "maria@ufpb.br",
+        "dados_bancarios": {"banco": "001", "agencia": "1234", "conta": "56789"},
+    },
+    "motivo_viagem": "Participação em congresso científico da área.",
+    "trechos": {
+        "ida": {"origem": "Bananeiras", "destino": "Recife", "data_hora": "2030-03-06T08:00"},
+        "retorno": [{"origem": "Recife", "destino": "Bananeiras", "data_hora": "2030-03-08T18:00"}],
+    },
+    "missao": {"inicio_data_hora": "2030-03-06T14:00", "termino_data_hora": "2030-03-08T12:00"},
+    "debito_recurso": {"tipo": "cchsa"},
+    "transporte": {"meios": ["veiculo_oficial"]},
+}
+
+ANEXO2 = {
+    "data_relatorio": "2030-03-11",
+    "proposto": {
+        "nome": "Maria da Silva",
+        "cpf": "12345678909",
+        "siape": "1234567",
+        "orgao": {"tipo": "cchsa"},
+    },
+    "afastamento": {
+        "ida": {"origem": "Bananeiras", "destino": "Recife", "data_hora": "2030-03-06T08:00"},
+        "retorno": {"origem": "Recife", "destino": "Bananeiras", "data_hora": "2030-03-08T18:00"},
+    },
+    "atividades_desenvolvidas": "Apresentação de trabalho e reuniões com a comissão organizadora.",
+    "viagem_realizada": "sim",
+}
+
+
+def _with(base, path, value):
+    payload = copy.deepcopy(base)
+    *parents, leaf = path.split(".")
+    target = payload
+    for key in parents:
+        target = target[key]
+    target[leaf] = value
+    return payload
+
+
+def test_anexo1_base_payload_is_valid():
+    result = validate_and_enrich_anexo1(copy.deepcopy(ANEXO1))
+    assert result["ok"], result
+
+
+def test_anexo2_base_payload_is_valid():
+    result = validate_and_enrich_anexo2(copy.deepcopy(ANEXO2))
+    assert result["ok"], result
+
+
+@pytest.mark.parametrize("path", [
+    "debito_recurso.detalhe",
+    "transporte.termo_veiculo_proprio_ciente",
+    "justificativas",
+    "servidor.rg",
+    "flags",
+])
+def test_anexo1_accepts_null_leaves_and_optional_objects(path):
+    result = validate_and_enrich_anexo1(_with(ANEXO1, path, None))
+    assert result["ok"], result
+
+
+@pytest.mark.parametrize("field", ["justificativa_fora_prazo", "justificativa_fds_feriado_dia_anterior"])
+def test_anexo1_accepts_null_justificativas(field):
+    result = validate_and_enrich_anexo1(_with(ANEXO1, "justificativas", {field: None}))
+    assert result["ok"], result
+
+
+@pytest.mark.parametrize("path, value", [
+    ("proposto.orgao.detalhe", None),
+    ("justificativa_prestacao_contas_fora_prazo", None),
+    ("flags", None),
+    ("proposto.orgao", {"tipo": "projetos", "detalhe": "Projeto X"}),
+])
+def test_anexo2_accepts_payloads_from_the_frontend(path, value):
+    result = validate_and_enrich_anexo2(_with(ANEXO2, path, value))
+    assert result["ok"], result
+
+
+def test_anexo2_rejects_singular_projeto():
+    result = validate_and_enrich_anexo2(_with(ANEXO2, "proposto.orgao", {"tipo": "projeto", "detalhe": "Projeto X"}))
+    assert not result["ok"]
+
+
+def test_null_data_hora_keeps_the_specific_message():
+    payload = _with(ANEXO1, "trechos.ida.data_hora", None)
+    result = validate_and_enrich_anexo1(payload)
+    assert not result["ok"]
+    assert {"field": "trechos.ida", "message": "Informe datas/horas válidas para todos os trechos de ida."} in result["errors"]
+
+
+def test_anyof_error_points_to_the_field_inside_the_trecho():
+    payload = _with(ANEXO1, "trechos.ida.data_hora", 20300306)
+    assert schema_errors("anexo1", payload) == [
+        {"field": "trechos.ida.data_hora", "message": "Formato inválido: esperado um texto."},
+    ]
+
+
+def test_anyof_error_in_a_list_of_trechos():
+    payload = _with(ANEXO1, "trechos.retorno", [{"origem": "Recife", "destino": "Bananeiras"}])
+    assert schema_errors("anexo1", payload) == [
+        {"field": "trechos.retorno.0.data_hora", "message": "Campo obrigatório ausente."},
+    ]
+
+
+def test_anyof_error_with_wrong_type():
+    payload = _with(ANEXO1, "trechos.ida", "Recife")
+    assert schema_errors("anexo1", payload) == [
+        {"field": "trechos.ida", "message": "Formato inválido: esperado um objeto ou uma lista."},
+    ]
+
+
+def test_required_objects_still_rejected():
+    payload = copy.deepcopy(ANEXO1)
+    del payload["servidor"]
+    result = validate_and_enrich_anexo1(payload)
+    assert not result["ok"]
+    assert {"field": "servidor", "message": "Campo obrigatório ausente."} in result["errors"]
+
+
+def test_enum_message_lists_only_real_values():
+    errors = schema_errors("anexo1", _with(ANEXO1, "tipo_solicitacao", "viagem"))
+    assert errors == [{
+        "field": "tipo_solicitacao",
+        "message": "Valor não permitido. Use: diarias, passagens, diarias_e_passagens.",
+    }]